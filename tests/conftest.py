@@ -33,6 +33,17 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
 )
 
+import pytest
+
+from core.testing import isolated_caches
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _isolated_caches():
+    with isolated_caches():
+        yield
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
@@ -0,0 +1,232 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite (WAL), общий для всех процессов на хосте.
+
+    В отличие от LocMemCache, воркеры gunicorn видят одни и те же записи,
+    а инвалидация через incr() счётчика версии доходит до всех сразу.
+    Целые числа хранятся как INTEGER, поэтому incr() атомарен на уровне
+    SQLite; остальные значения сериализуются pickle. При превышении
+    MAX_ENTRIES удаляются просроченные и давно не читавшиеся записи.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+    """
+
+    # Время последнего чтения обновляется не чаще раза в секунду,
+    # чтобы горячие ключи не превращали каждый get() в запись.
+    ACCESS_RESOLUTION = 1
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self.location)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.location, timeout=30, isolation_level=None
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL'
+            ') WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)'
+        )
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _dump(value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _touch_accessed(self, keys, now):
+        # UPDATE берёт блокировку записи, даже если условие не совпало
+        # ни с одной строкой, поэтому без устаревших ключей его нет.
+        if not keys:
+            return
+        self._connection().executemany(
+            'UPDATE cache SET accessed = ? WHERE key = ? AND accessed < ?',
+            ((now, key, now - self.ACCESS_RESOLUTION) for key in keys),
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._get_many_raw([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        mapping = {self._key(key, version): key for key in keys}
+        found = self._get_many_raw(list(mapping))
+        return {mapping[key]: value for key, value in found.items()}
+
+    def _get_many_raw(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires > ?)',
+            (*keys, now),
+        ).fetchall()
+        self._touch_accessed(
+            [
+                key for key, _, accessed in rows
+                if accessed < now - self.ACCESS_RESOLUTION
+            ],
+            now,
+        )
+        return {key: self._load(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        self._connection().executemany(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+            (
+                (self._key(key, version), self._dump(value), expires, now)
+                for key, value in data.items()
+            ),
+        )
+        self._maybe_cull(len(data))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        with self._transaction() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)',
+                (key, self._dump(value), expires, now),
+            ).rowcount
+        self._maybe_cull(added)
+        return bool(added)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return bool(self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        ).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self._load(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dump(value), key),
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self._connection().executemany(
+            'DELETE FROM cache WHERE key = ?',
+            ((self._key(key, version), ) for key in keys),
+        )
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version) is not self
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь срок потока: открывать файл и выставлять
+        # PRAGMA на каждый запрос дороже самих обращений к кешу.
+        pass
+
+    def _transaction(self):
+        return _Immediate(self._connection())
+
+    def _maybe_cull(self, written):
+        self._writes += written
+        if self._writes < CULL_EVERY:
+            return
+        self._writes = 0
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(), )
+        )
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (count - self._max_entries + count // self._cull_frequency, ),
+        )
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT: блокировка записи на всю операцию."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
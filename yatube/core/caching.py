@@ -0,0 +1,70 @@
+import math
+import random
+import time
+
+from django.core.cache import caches
+
+LOCK_TIMEOUT = 10
+WAIT_STEP = 0.05
+EARLY_EXPIRY_BETA = 1.0
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None,
+                   version=None, cache_name='default'):
+    """Значение из кеша с защитой от одновременного пересчёта.
+
+    Запись живёт timeout секунд свежей и ещё stale_timeout (по умолчанию
+    столько же) устаревшей. Пересчитывает её только процесс, захвативший
+    ключ блокировки; остальные в это время получают устаревшее значение,
+    а при пустом кеше ждут результата до LOCK_TIMEOUT секунд. Незадолго
+    до истечения запись с вероятностью, растущей к сроку, пересчитывается
+    заранее (XFetch), чтобы не истекать у всех одновременно.
+
+    version хранится рядом со значением, а не в ключе: после смены версии
+    запись считается устаревшей и так же отдаётся, пока один процесс её
+    пересчитывает, а не пропадает из кеша у всех сразу.
+    """
+    cache = caches[cache_name]
+    if stale_timeout is None:
+        stale_timeout = timeout
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until, cost, entry_version = entry
+        early = cost * EARLY_EXPIRY_BETA * -math.log(1 - random.random())
+        if entry_version == version and time.time() + early < fresh_until:
+            return value
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+        return _refresh(
+            cache, key, lock_key, compute, timeout, stale_timeout, version
+        )
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        return _refresh(
+            cache, key, lock_key, compute, timeout, stale_timeout, version
+        )
+    deadline = time.time() + LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+def _refresh(cache, key, lock_key, compute, timeout, stale_timeout,
+             version):
+    try:
+        started = time.time()
+        value = compute()
+        cost = time.time() - started
+        if timeout is None:
+            cache.set(key, (value, math.inf, cost, version), None)
+        else:
+            cache.set(
+                key, (value, time.time() + timeout, cost, version),
+                timeout + stale_timeout,
+            )
+        return value
+    finally:
+        cache.delete(lock_key)
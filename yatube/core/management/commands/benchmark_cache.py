@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+VERSION_KEY = 'bench:version'
+
+
+def make_cache(backend, location):
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    if backend == 'locmem':
+        return LocMemCache(location, params)
+    return SQLiteCache(location, params)
+
+
+def worker(backend, location, operations, keys, seed):
+    """Читает ключи, заполняет промахи и иногда увеличивает версию."""
+    cache = make_cache(backend, location)
+    rng = random.Random(seed)
+    hits = fills = 0
+    started = time.perf_counter()
+    for number in range(operations):
+        key = f'bench:{rng.randrange(keys)}'
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, 'x' * 512, 300)
+            fills += 1
+        if number % 100 == 0:
+            try:
+                cache.incr(VERSION_KEY)
+            except ValueError:
+                cache.add(VERSION_KEY, 1, None)
+    return time.perf_counter() - started, hits, fills
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LocMemCache и SQLiteCache под нагрузкой '
+        'из нескольких процессов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--operations', type=int, default=20000)
+        parser.add_argument('--keys', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        context = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as directory:
+            for backend in ('locmem', 'sqlite'):
+                location = os.path.join(directory, f'{backend}.sqlite3')
+                jobs = [
+                    (
+                        backend, location, options['operations'],
+                        options['keys'], seed,
+                    )
+                    for seed in range(processes)
+                ]
+                with context.Pool(processes) as pool:
+                    results = pool.starmap(worker, jobs)
+                self.report(backend, results, options['operations'])
+
+    def report(self, backend, results, operations):
+        total = operations * len(results)
+        elapsed = max(result[0] for result in results)
+        hits = sum(result[1] for result in results)
+        fills = sum(result[2] for result in results)
+        self.stdout.write(
+            f'{backend}: {total / elapsed:,.0f} оп/с, '
+            f'попаданий {hits / total:.1%}, заполнений {fills}'
+        )
@@ -0,0 +1,385 @@
+import json
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+)
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler
+)
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+# Вес маршрута в смеси и нужен ли для него вход. Вес задан в долях
+# запросов; маршруты только для вошедших не попадают в смесь анонимов.
+ROUTES = (
+    ('posts:index', 30, False),
+    ('posts:post_detail', 20, False),
+    ('posts:profile', 12, False),
+    ('posts:group_list', 10, False),
+    ('posts:follow_index', 8, True),
+    ('posts:search', 5, False),
+    ('posts:trending', 5, False),
+    ('posts:groups', 4, False),
+    ('posts:post_comments', 4, False),
+    ('posts:post_create', 1, True),
+    ('posts:post_edit', 1, True),
+    ('about:author', 1, False),
+    ('about:tech', 1, False),
+    ('users:login', 1, False),
+    ('users:signup', 1, False),
+)
+SAMPLES = 200
+SESSIONS = 50
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    if not values:
+        return None
+    return values[max(math.ceil(len(values) * fraction) - 1, 0)]
+
+
+def summarize(results, elapsed):
+    latencies = sorted(result['latency'] for result in results)
+    queries = [
+        result['queries'] for result in results
+        if result['queries'] is not None
+    ]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for result in results if result['error']),
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'p50': round(percentile(latencies, 0.5), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        } if queries else None,
+    }
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Время редиректа и страницы, на которую он ведёт, не смешиваются.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер GET-маршрутов posts, users и about: смесь '
+        'анонимных запросов и запросов вошедших пользователей. Пишет '
+        'req/s, p50/p95/p99 и число SQL-запросов (из Server-Timing) по '
+        'каждому маршруту в JSON для сравнения между коммитами. Без --url '
+        'поднимает приложение из yatube/wsgi.py в этом же процессе: цифры '
+        'годятся для сравнения, но не для оценки мощности сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера с той же базой, '
+                 'например http://127.0.0.1:8000',
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--logged-in-share',
+            type=float,
+            default=0.3,
+            help='Доля запросов от вошедших пользователей',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=100,
+            help='Сколько запросов выполнить до замера',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очистить кеш перед замером',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для JSON-отчёта')
+        parser.add_argument(
+            '--compare', help='Прошлый JSON-отчёт для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests и --concurrency больше нуля')
+        if not 0 <= options['logged_in_share'] <= 1:
+            raise CommandError('--logged-in-share должен быть от 0 до 1')
+        rng = random.Random(options['seed'])
+        samples = self.sample_data(rng)
+        sessions = self.create_sessions(samples['authors'])
+        plan = self.plan(
+            rng, samples, sessions,
+            options['warmup'] + options['requests'],
+            options['logged_in_share'],
+        )
+        warmup, plan = plan[:options['warmup']], plan[options['warmup']:]
+        server = None
+        base_url = options['url']
+        if base_url is None:
+            server, base_url = self.start_server()
+        try:
+            self.run(base_url, warmup, options['concurrency'])
+            if options['cold']:
+                cache.clear()
+            started = time.perf_counter()
+            results = self.run(base_url, plan, options['concurrency'])
+            elapsed = time.perf_counter() - started
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            self.delete_sessions(sessions)
+        report = self.report(results, elapsed, base_url, server, options)
+        self.print_report(report)
+        if options['compare']:
+            self.compare(report, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file_:
+                json.dump(report, file_, ensure_ascii=False, indent=2)
+
+    def sample_data(self, rng):
+        """Посты, авторы и группы для адресов: случайные ключи по индексу.
+
+        Выборка по pk >= случайного числа не сортирует всю таблицу, как
+        order_by('?'), и годится для базы любого размера.
+        """
+        last = Post.objects.aggregate(last=Max('pk'))['last']
+        if last is None:
+            raise CommandError(
+                'В базе нет постов, заполните её: manage.py seed'
+            )
+        posts = []
+        for _ in range(SAMPLES):
+            post = Post.objects.filter(
+                pk__gte=rng.randint(1, last)
+            ).order_by('pk').select_related('author', 'group').first()
+            if post is not None:
+                posts.append(post)
+        words = [
+            word for post in posts for word in re.findall(r'\w{4,}', post.text)
+        ]
+        authors = {post.author_id: post.author for post in posts}
+        groups = [post.group.slug for post in posts if post.group]
+        if not groups:
+            groups = list(Group.objects.values_list('slug', flat=True)[:1])
+        return {
+            'posts': posts,
+            'authors': list(authors.values())[:SESSIONS],
+            'groups': groups,
+            'words': words or ['пост'],
+        }
+
+    def create_sessions(self, authors):
+        """Сессии вошедших пользователей без обращения к форме входа."""
+        engine = import_module(settings.SESSION_ENGINE)
+        sessions = {}
+        for author in authors:
+            session = engine.SessionStore()
+            session[SESSION_KEY] = author._meta.pk.value_to_string(author)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = author.get_session_auth_hash()
+            session.save()
+            sessions[author.pk] = session.session_key
+        return sessions
+
+    def delete_sessions(self, sessions):
+        engine = import_module(settings.SESSION_ENGINE)
+        for session_key in sessions.values():
+            engine.SessionStore(session_key).delete()
+
+    def plan(self, rng, samples, sessions, count, logged_in_share):
+        """Список запросов (маршрут, адрес, ключ сессии) по смеси ROUTES."""
+        available = [
+            route for route in ROUTES
+            if route[0] != 'posts:group_list' or samples['groups']
+        ]
+        anonymous = [route for route in available if not route[2]]
+        # post_edit открывает автор поста: берутся посты авторов с сессией.
+        editable = [
+            post for post in samples['posts'] if post.author_id in sessions
+        ]
+        plan = []
+        for _ in range(count):
+            logged_in = rng.random() < logged_in_share
+            routes = available if logged_in else anonymous
+            name, _, _ = rng.choices(
+                routes, weights=[route[1] for route in routes]
+            )[0]
+            if name == 'posts:post_edit':
+                post = rng.choice(editable)
+                session = sessions[post.author_id]
+            else:
+                post = rng.choice(samples['posts'])
+                session = rng.choice(list(sessions.values()))
+            if not logged_in:
+                session = None
+            plan.append((name, self.url(rng, name, post, samples), session))
+        return plan
+
+    def url(self, rng, name, post, samples):
+        if name in ('posts:post_detail', 'posts:post_comments',
+                    'posts:post_edit'):
+            return reverse(name, args=[post.pk])
+        if name == 'posts:profile':
+            return reverse(name, args=[post.author.username])
+        if name == 'posts:group_list':
+            return reverse(name, args=[rng.choice(samples['groups'])])
+        if name == 'posts:search':
+            query = urllib.parse.urlencode({'q': rng.choice(samples['words'])})
+            return f'{reverse(name)}?{query}'
+        return reverse(name)
+
+    def start_server(self):
+        from yatube.wsgi import application
+
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        server.set_app(application)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        return server, f'http://{host}:{port}'
+
+    def run(self, base_url, plan, concurrency):
+        opener = urllib.request.build_opener(NoRedirect)
+
+        def fetch(item):
+            name, path, session = item
+            request = urllib.request.Request(base_url + path)
+            if session is not None:
+                request.add_header(
+                    'Cookie', f'{settings.SESSION_COOKIE_NAME}={session}'
+                )
+            started = time.perf_counter()
+            try:
+                with opener.open(request) as response:
+                    response.read()
+                    status, headers = response.status, response.headers
+            except urllib.error.HTTPError as error:
+                error.read()
+                status, headers = error.code, error.headers
+            except OSError:
+                status, headers = None, {}
+            latency = (time.perf_counter() - started) * 1000
+            match = QUERIES.search(headers.get('Server-Timing', ''))
+            return {
+                'route': name,
+                'latency': latency,
+                'error': status is None or status >= 400,
+                'queries': int(match.group(1)) if match else None,
+            }
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(fetch, plan))
+
+    def report(self, results, elapsed, base_url, server, options):
+        routes = {}
+        for result in results:
+            routes.setdefault(result['route'], []).append(result)
+        return {
+            'created': timezone.now().isoformat(),
+            'revision': self.revision(),
+            'target': 'in-process' if server is not None else base_url,
+            'concurrency': options['concurrency'],
+            'logged_in_share': options['logged_in_share'],
+            'cold': options['cold'],
+            'duration_s': round(elapsed, 2),
+            'total': summarize(results, elapsed),
+            'routes': {
+                name: summarize(routes[name], elapsed)
+                for name, _, _ in ROUTES if name in routes
+            },
+        }
+
+    @staticmethod
+    def revision():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, report):
+        def line(name, summary):
+            latency = summary['latency_ms']
+            queries = summary['queries']
+            return (
+                f'{name:<22} {summary["requests"]:>6} '
+                f'{summary["throughput_rps"]:>8} '
+                f'{latency["p50"]:>8} {latency["p95"]:>8} '
+                f'{latency["p99"]:>8} '
+                f'{queries["mean"] if queries else "-":>7} '
+                f'{summary["errors"]:>6}'
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{"маршрут":<22} {"запр.":>6} {"req/s":>8} {"p50 мс":>8} '
+            f'{"p95 мс":>8} {"p99 мс":>8} {"SQL":>7} {"ошиб.":>6}'
+        ))
+        for name, summary in report['routes'].items():
+            self.stdout.write(line(name, summary))
+        self.stdout.write(line('всего', report['total']))
+
+    def compare(self, report, path):
+        with open(path, encoding='utf-8') as file_:
+            previous = json.load(file_)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Сравнение с {previous.get("revision") or path}: '
+            f'изменение p95 и req/s'
+        ))
+        rows = [('всего', report['total'], previous['total'])] + [
+            (name, summary, previous['routes'][name])
+            for name, summary in report['routes'].items()
+            if name in previous['routes']
+        ]
+        for name, current, old in rows:
+            self.stdout.write(
+                f'{name:<22} '
+                f'p95 {self.change(current, old, "p95")}, '
+                f'req/s {self.change(current, old, None)}'
+            )
+
+    @staticmethod
+    def change(current, old, latency_key):
+        if latency_key is None:
+            now, before = current['throughput_rps'], old['throughput_rps']
+        else:
+            now = current['latency_ms'][latency_key]
+            before = old['latency_ms'][latency_key]
+        if not before:
+            return f'{now}'
+        return f'{before} -> {now} ({(now - before) / before:+.0%})'
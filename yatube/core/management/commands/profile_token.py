@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт заголовок X-Profile, с которым запрос профилируется вне '
+        'выборки; действует PROFILING_TOKEN_MAX_AGE секунд'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'X-Profile: {make_token()}')
@@ -0,0 +1,127 @@
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_http_date_safe
+
+# Имена из хеша содержимого: картинки постов (SHA-256) и миниатюры sorl
+# (md5 ключа оригинала и опций). По такому имени файл не меняется никогда.
+CONTENT_HASH_NAME = re.compile(r'^[0-9a-f]{32}([0-9a-f]{32})?\.\w+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class RangeFile:
+    """Файл, из которого читается не больше length байт с offset."""
+
+    def __init__(self, file_, offset, length):
+        file_.seek(offset)
+        self.file = file_
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def media_path(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def media_etag(path, stat):
+    name = os.path.basename(path)
+    if CONTENT_HASH_NAME.match(name):
+        return '"%s"' % name.split('.')[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header, size):
+    """(начало, длина) из одиночного Range: bytes=..., иначе None."""
+    match = RANGE.match(header.strip())
+    if match is None or size == 0:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        return None
+    if start > end:
+        return None
+    return start, end - start + 1
+
+
+def range_applies(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def media_response(request, path, full_path, stat, content_type):
+    sendfile = settings.MEDIA_SENDFILE
+    if sendfile == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        )
+        return response
+    if sendfile == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+    header = request.META.get('HTTP_RANGE')
+    requested = header and parse_range(header, stat.st_size)
+    if header and not requested and RANGE.match(header.strip()):
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%d' % stat.st_size
+        return response
+    if requested and range_applies(
+        request, media_etag(path, stat), int(stat.st_mtime)
+    ):
+        start, length = requested
+        response = FileResponse(
+            RangeFile(open(full_path, 'rb'), start, length),
+            status=206, content_type=content_type,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = 'bytes %d-%d/%d' % (
+            start, start + length - 1, stat.st_size
+        )
+        return response
+    # Файл целиком: FileResponse отдаёт его через wsgi.file_wrapper,
+    # и gunicorn копирует его в сокет sendfile() без чтения в Python.
+    return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+
+def cache_media(response, path):
+    if CONTENT_HASH_NAME.match(os.path.basename(path)):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
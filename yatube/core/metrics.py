@@ -0,0 +1,107 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+# Границы корзин гистограммы времени ответа, мс.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+current = contextvars.ContextVar('request_metrics', default=None)
+
+_lock = threading.Lock()
+_samples = defaultdict(
+    lambda: deque(maxlen=settings.REQUEST_METRICS_WINDOW)
+)
+
+
+class RequestMetrics:
+    """Запросы к БД и время одного HTTP-запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper: работает и без DEBUG.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+class timed_render:
+    """Время рендера шаблона без запросов, выполненных из шаблона."""
+
+    def __enter__(self):
+        self.metrics = current.get()
+        if self.metrics is not None:
+            self.started = time.perf_counter()
+            self.db_time = self.metrics.db_time
+
+    def __exit__(self, *exc_info):
+        if self.metrics is not None:
+            self.metrics.render_time += (
+                time.perf_counter() - self.started
+                - (self.metrics.db_time - self.db_time)
+            )
+
+
+def record(view_name, metrics):
+    sample = (
+        metrics.queries,
+        metrics.db_time * 1000,
+        metrics.render_time * 1000,
+        metrics.total_time * 1000,
+    )
+    with _lock:
+        _samples[view_name].append(sample)
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def snapshot():
+    """Сводка по последним REQUEST_METRICS_WINDOW запросам каждого view.
+
+    Только по этому процессу: у каждого воркера своя гистограмма.
+    """
+    with _lock:
+        samples = {view: list(values) for view, values in _samples.items()}
+    report = {}
+    for view, values in samples.items():
+        histogram = [0] * (len(BUCKETS) + 1)
+        for *_, total in values:
+            histogram[bisect.bisect_left(BUCKETS, total)] += 1
+        queries = sorted(value[0] for value in values)
+        totals = sorted(value[3] for value in values)
+        report[view] = {
+            'requests': len(values),
+            'queries_max': queries[-1],
+            'queries_p50': _percentile(queries, 0.5),
+            'db_ms_avg': sum(value[1] for value in values) / len(values),
+            'render_ms_avg': sum(value[2] for value in values) / len(values),
+            'total_ms_p50': _percentile(totals, 0.5),
+            'total_ms_p95': _percentile(totals, 0.95),
+            'histogram': dict(zip(
+                [f'<={bound}ms' for bound in BUCKETS] + [f'>{BUCKETS[-1]}ms'],
+                histogram,
+            )),
+        }
+    return report
+
+
+def reset():
+    with _lock:
+        _samples.clear()
@@ -0,0 +1,127 @@
+import cProfile
+import logging
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from . import metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Число SQL-запросов, время БД и рендера шаблонов на каждый запрос.
+
+    Значения уходят в заголовок Server-Timing и в скользящую
+    гистограмму процесса (core.metrics.snapshot). Запрос, превысивший
+    бюджет QUERY_BUDGETS своего view, пишется в лог с предупреждением.
+    Стоит первым в MIDDLEWARE, чтобы учитывать и остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        view_name = self.view_name(request)
+        metrics.record(view_name, request_metrics)
+        self.check_budget(request, view_name, request_metrics)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(request_metrics)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        # Ответ из полностраничного кеша отдаётся до резолвинга URL.
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return '-'
+        return match.view_name
+
+    @staticmethod
+    def check_budget(request, view_name, request_metrics):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and request_metrics.queries > budget:
+            logger.warning(
+                'Бюджет запросов превышен: %s %s - %d при бюджете %d',
+                view_name, request.get_full_path(),
+                request_metrics.queries, budget,
+            )
+
+    @staticmethod
+    def server_timing(request_metrics):
+        return (
+            f'db;dur={request_metrics.db_time * 1000:.1f};'
+            f'desc="{request_metrics.queries} queries", '
+            f'render;dur={request_metrics.render_time * 1000:.1f}, '
+            f'total;dur={request_metrics.total_time * 1000:.1f}'
+        )
+
+
+class ProfilingMiddleware:
+    """Профилирование каждого PROFILING_SAMPLE_RATE-го запроса.
+
+    Запрос с подписанным заголовком X-Profile (manage.py profile_token)
+    профилируется всегда. Результат пишется в PROFILING_DIR/<view>/:
+    при PROFILING_FORMAT = 'collapsed' - стеки сэмплирующего
+    профилировщика для flamegraph, при 'pstats' - статистика cProfile.
+    Выключенный (PROFILING_ENABLED = False) middleware Django не
+    подключает вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        if settings.PROFILING_FORMAT == 'pstats':
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+            path = profiling.profile_path(
+                RequestMetricsMiddleware.view_name(request), '.prof'
+            )
+            profile.dump_stats(path)
+        else:
+            with profiling.StackSampler(
+                settings.PROFILING_INTERVAL
+            ) as sampler:
+                response = self.get_response(request)
+            path = profiling.profile_path(
+                RequestMetricsMiddleware.view_name(request), '.collapsed'
+            )
+            with open(path, 'w', encoding='utf-8') as file_:
+                file_.write(sampler.collapsed())
+        logger.info('Профиль %s: %s', request.get_full_path(), path)
+        return response
+
+    @staticmethod
+    def should_profile(request):
+        token = request.META.get('HTTP_X_PROFILE')
+        if token:
+            return profiling.check_token(token)
+        rate = settings.PROFILING_SAMPLE_RATE
+        return bool(rate) and random.randrange(rate) == 0
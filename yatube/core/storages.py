@@ -0,0 +1,58 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы хранятся под SHA-256 содержимого, по подкаталогам.
+
+    Имя файла posts/ab/cd/abcd….gif: каталог из upload_to, два уровня по
+    первым байтам хеша (65536 каталогов) и расширение исходного имени.
+    Одинаковое содержимое сохраняется один раз, все записи ссылаются на
+    один файл. При повторной загрузке у файла обновляется mtime, чтобы
+    сборщик мусора не удалил его, пока новая ссылка ещё не сохранена.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, а не подбирается.
+        return name
+
+    def content_name(self, name, content):
+        # Хеш загрузки уже посчитан HashingUploadHandler при приёме.
+        digest = getattr(content, 'sha256', None)
+        if digest is None:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            content.seek(0)
+            digest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        ).replace('\\', '/')
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        # Запись во временный файл и атомарная замена: читатель не увидит
+        # недописанный файл, а одновременная запись того же содержимого
+        # просто заменит его идентичной копией.
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+    def iter_files(self, directory):
+        """Все файлы под directory с временем изменения, рекурсивно."""
+        directories, files = self.listdir(directory)
+        for filename in files:
+            name = os.path.join(directory, filename).replace('\\', '/')
+            yield name, os.path.getmtime(self.path(name))
+        for subdirectory in directories:
+            yield from self.iter_files(
+                os.path.join(directory, subdirectory)
+            )
@@ -0,0 +1,29 @@
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import timed_render
+
+
+class TimedTemplate(Template):
+    """Шаблон, чьё время рендера попадает в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        with timed_render():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates с замером рендера для RequestMetricsMiddleware.
+
+    Оборачиваются только шаблоны верхнего уровня: include и extends
+    рендерятся внутри них и отдельно не считаются.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
@@ -0,0 +1,73 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core.caching import get_or_compute
+
+register = template.Library()
+
+
+class StaleWhileRevalidateNode(CacheNode):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on,
+                 version_var):
+        super().__init__(
+            nodelist, expire_time_var, fragment_name, vary_on, None
+        )
+        self.version_var = version_var
+
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                '"swr_cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    '"swr_cache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}'
+                )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        version = None
+        if self.version_var is not None:
+            version = self.version_var.resolve(context)
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            version=version,
+        )
+
+
+@register.tag('swr_cache')
+def do_swr_cache(parser, token):
+    """Как {% cache %}, но с защитой от stampede и отдачей устаревшего.
+
+    {% swr_cache 1200 index_page page_key version=feed_version %}
+        ...
+    {% endswr_cache %}
+
+    version не входит в ключ: фрагмент прежней версии считается
+    устаревшим и отдаётся, пока его пересчитывает один процесс.
+    """
+    nodelist = parser.parse(('endswr_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    version = None
+    if len(tokens) > 3 and tokens[-1].startswith('version='):
+        version = parser.compile_filter(tokens.pop()[len('version='):])
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return StaleWhileRevalidateNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        version,
+    )
@@ -0,0 +1,106 @@
+import contextlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+@contextlib.contextmanager
+def isolated_caches():
+    """Файловые кеши из CACHES на время тестов - во временном каталоге.
+
+    Иначе тесты читали бы записи работающего сайта и прошлых прогонов,
+    а cache.clear() в тестах стирал бы настоящий кеш.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {}
+        for alias, params in settings.CACHES.items():
+            params = dict(params)
+            if params.get('LOCATION') and os.path.isabs(params['LOCATION']):
+                params['LOCATION'] = os.path.join(
+                    directory, os.path.basename(params['LOCATION'])
+                )
+            caches[alias] = params
+        with override_settings(CACHES=caches):
+            yield
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner с кешами во временном каталоге."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = isolated_caches()
+        self._caches.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
+
+
+@contextlib.contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет on_commit-колбэки, добавленные внутри блока.
+
+    TestCase оборачивает тест в транзакцию, которая не фиксируется, и
+    колбэки transaction.on_commit без этого не вызываются никогда.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
+
+
+class QueryCountMixin:
+    """Проверки числа SQL-запросов для TestCase.
+
+    assertNumQueries фиксирует точное число, которое приходится
+    переписывать при любой правке view. Здесь проверяется другое: что
+    число запросов не растёт вместе с размером страницы или данных,
+    то есть во view и шаблонах нет N+1, и что оно укладывается в бюджет.
+    """
+
+    def capture_queries(self, func, using=DEFAULT_DB_ALIAS):
+        """Выполняет func и возвращает список выполненных SQL."""
+        with CaptureQueriesContext(connections[using]) as context:
+            func()
+        return [query['sql'] for query in context.captured_queries]
+
+    def assertQueriesStable(self, requests, grow, using=DEFAULT_DB_ALIAS):
+        """Число запросов функций из requests не меняется после grow().
+
+        requests - словарь {название: функция}; grow добавляет данные или
+        меняет настройки, например размер страницы. Каждая функция
+        проверяется в своём subTest, при падении в сообщение попадают
+        запросы обоих прогонов.
+        """
+        before = {
+            name: self.capture_queries(func, using)
+            for name, func in requests.items()
+        }
+        grow()
+        for name, func in requests.items():
+            with self.subTest(request=name):
+                after = self.capture_queries(func, using)
+                if len(after) != len(before[name]):
+                    self.fail(
+                        f'Число запросов выросло с {len(before[name])} '
+                        f'до {len(after)}.\nДо:\n'
+                        + '\n'.join(before[name])
+                        + '\nПосле:\n' + '\n'.join(after)
+                    )
+
+    def assertMaxQueries(self, limit, func, using=DEFAULT_DB_ALIAS):
+        """func выполняет не больше limit запросов."""
+        queries = self.capture_queries(func, using)
+        if len(queries) > limit:
+            self.fail(
+                f'{len(queries)} запросов при бюджете {limit}:\n'
+                + '\n'.join(queries)
+            )
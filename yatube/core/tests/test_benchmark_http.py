@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+
+from posts.models import Group, Post, User
+
+
+class BenchmarkHttpTests(TransactionTestCase):
+    # Сервер работает в другом потоке и видит только закоммиченные
+    # данные, поэтому TransactionTestCase.
+
+    def setUp(self):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(5):
+            Post.objects.create(
+                author=author, group=group, text=f'Пост номер {number}'
+            )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'report.json')
+
+    def benchmark(self, **options):
+        stdout = StringIO()
+        call_command(
+            'benchmark_http', requests=40, concurrency=1, warmup=5,
+            logged_in_share=0.5, output=self.output, stdout=stdout,
+            **options,
+        )
+        with open(self.output, encoding='utf-8') as file_:
+            return json.load(file_), stdout.getvalue()
+
+    def test_report(self):
+        report, stdout = self.benchmark()
+        self.assertEqual(report['total']['requests'], 40)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertEqual(report['target'], 'in-process')
+        latency = report['total']['latency_ms']
+        self.assertLessEqual(latency['p50'], latency['p95'])
+        self.assertLessEqual(latency['p95'], latency['p99'])
+        self.assertIsNotNone(report['total']['queries'])
+        self.assertIn('posts:index', report['routes'])
+        self.assertIn('posts:index', stdout)
+        self.assertFalse(Session.objects.exists())
+
+    def test_compare(self):
+        self.benchmark()
+        previous = os.path.join(os.path.dirname(self.output), 'old.json')
+        os.rename(self.output, previous)
+        _, stdout = self.benchmark(compare=previous)
+        self.assertIn('p95', stdout.split('Сравнение')[1])
+
+    def test_empty_database(self):
+        Post.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('benchmark_http', stdout=StringIO())
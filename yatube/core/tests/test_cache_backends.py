@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+def _incr_many(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('text', {'a': 1})
+        self.assertEqual(cache.get('text'), {'a': 1})
+        self.assertFalse(cache.add('text', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        self.assertEqual(
+            cache.get_many(['text', 'new', 'missing']),
+            {'text': {'a': 1}, 'new': 'value'}
+        )
+        cache.delete('text')
+        self.assertIsNone(cache.get('text'))
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_expired_entries_are_invisible(self):
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'fresh'))
+
+    def test_incr_is_atomic_across_processes(self):
+        """Счётчик версии не теряет инкременты из разных процессов."""
+        self.cache.set('counter', 0, None)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_incr_many, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_recent_hit_does_not_write(self):
+        """Чтение недавно прочитанного ключа не берёт блокировку записи."""
+        self.cache.set('key', 'value')
+        statements = []
+        self.cache._connection().set_trace_callback(statements.append)
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertFalse(
+            [sql for sql in statements if sql.startswith('UPDATE')]
+        )
+
+    def test_eviction_keeps_size_bounded(self):
+        cache = SQLiteCache(
+            self.location, {'OPTIONS': {'MAX_ENTRIES': 50}}
+        )
+        cache.set('hot', 'value')
+        for number in range(300):
+            cache.set(f'key{number}', number)
+            cache.get('hot')
+        count = cache._connection().execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0]
+        self.assertLessEqual(count, 50 + 100)
+
+
+class TestCacheIsolationTests(SimpleTestCase):
+    def test_tests_do_not_use_site_cache(self):
+        self.assertNotEqual(
+            os.path.dirname(cache.location), settings.BASE_DIR
+        )
@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core.caching import get_or_compute
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_fresh_value_is_not_recomputed(self):
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'value 1')
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_other_worker_refreshes(self):
+        """Пока блокировка занята, отдаётся устаревшее значение."""
+        cache.set('key', ('old', time.time() - 1, 0, None), 60)
+        cache.add('key:lock', 1)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'old')
+        self.assertEqual(self.calls, 0)
+
+    def test_stale_value_is_refreshed_by_lock_holder(self):
+        cache.set('key', ('old', time.time() - 1, 0, None), 60)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'value 1')
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        cache.add('key:lock', 1)
+
+        def fill():
+            time.sleep(0.1)
+            cache.set('key', ('filled', time.time() + 60, 0, None), 60)
+
+        filler = threading.Thread(target=fill)
+        filler.start()
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'filled')
+        filler.join()
+        self.assertEqual(self.calls, 0)
+
+    def test_old_version_served_while_other_worker_refreshes(self):
+        """Запись прежней версии отдаётся, а не ждёт пересчёта."""
+        get_or_compute('key', self.compute, 60, version=1)
+        cache.add('key:lock', 1)
+        self.assertEqual(
+            get_or_compute('key', self.compute, 60, version=2), 'value 1'
+        )
+        self.assertEqual(self.calls, 1)
+
+    def test_old_version_is_refreshed_by_lock_holder(self):
+        get_or_compute('key', self.compute, 60, version=1)
+        self.assertEqual(
+            get_or_compute('key', self.compute, 60, version=2), 'value 2'
+        )
+        self.assertEqual(
+            get_or_compute('key', self.compute, 60, version=2), 'value 2'
+        )
+        self.assertEqual(self.calls, 2)
+
+    def test_lock_released_when_compute_fails(self):
+        with self.assertRaises(RuntimeError):
+            get_or_compute('key', mock.Mock(side_effect=RuntimeError), 60)
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_swr_cache_tag(self):
+        template = Template(
+            '{% load swr_cache %}'
+            '{% swr_cache 60 fragment name %}{{ name }}{% endswr_cache %}'
+        )
+        self.assertEqual(template.render(Context({'name': 'a'})), 'a')
+        cache.set('unrelated', 1)
+        self.assertEqual(template.render(Context({'name': 'a'})), 'a')
+        self.assertEqual(template.render(Context({'name': 'b'})), 'b')
+
+    def test_swr_cache_tag_version(self):
+        """Версия фрагмента не входит в ключ: прежняя отдаётся устаревшей."""
+        template = Template(
+            '{% load swr_cache %}'
+            '{% swr_cache 60 fragment name version=version %}'
+            '{{ text }}{% endswr_cache %}'
+        )
+        lock_key = make_template_fragment_key('fragment', ['a']) + ':lock'
+
+        def render(text, version):
+            return template.render(
+                Context({'name': 'a', 'text': text, 'version': version})
+            )
+
+        self.assertEqual(render('old', 1), 'old')
+        self.assertEqual(render('new', 1), 'old')
+        cache.add(lock_key, 1)
+        self.assertEqual(render('new', 2), 'old')
+        cache.delete(lock_key)
+        self.assertEqual(render('new', 2), 'new')
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.test import TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+CONTENT = bytes(range(256)) * 4
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+HASHED_NAME = f'posts/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.gif'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (HASHED_NAME, 'posts/legacy.gif'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file_:
+                file_.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.client.get('/media/' + name, **headers)
+
+    def test_whole_file(self):
+        response = self.get(HASHED_NAME)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['ETag'], f'"{DIGEST}"')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_legacy_name_short_cache(self):
+        response = self.get('posts/legacy.gif')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+
+    def test_not_modified(self):
+        response = self.get(HASHED_NAME, HTTP_IF_NONE_MATCH=f'"{DIGEST}"')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_range(self):
+        cases = {
+            'bytes=0-9': (0, 10),
+            'bytes=1000-': (1000, 24),
+            'bytes=-5': (1019, 5),
+            'bytes=1020-5000': (1020, 4),
+        }
+        for header, (start, length) in cases.items():
+            with self.subTest(header=header):
+                response = self.get(HASHED_NAME, HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:start + length],
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{start + length - 1}/{len(CONTENT)}',
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HASHED_NAME, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.get(
+            HASHED_NAME, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_path_outside_media_root(self):
+        response = self.get('../../etc/passwd')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.get(HASHED_NAME)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/' + HASHED_NAME
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SENDFILE='x-sendfile')
+    def test_sendfile(self):
+        response = self.get(HASHED_NAME)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, HASHED_NAME),
+        )
@@ -0,0 +1,84 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", '
+    r'render;dur=([\d.]+), total;dur=([\d.]+)'
+)
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match)
+        queries, render_ms, total_ms = match.groups()
+        self.assertGreater(int(queries), 0)
+        self.assertGreater(float(render_ms), 0)
+        self.assertLessEqual(float(render_ms), float(total_ms))
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_snapshot_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse('posts:profile', args=['author']))
+        report = metrics.snapshot()['posts:profile']
+        self.assertEqual(report['requests'], 3)
+        self.assertGreater(report['queries_max'], 0)
+        self.assertEqual(sum(report['histogram'].values()), 3)
+
+    @override_settings(REQUEST_METRICS_WINDOW=2)
+    def test_window_keeps_latest(self):
+        metrics.reset()
+        for _ in range(3):
+            self.client.get(reverse('about:author'))
+        self.assertEqual(metrics.snapshot()['about:author']['requests'], 2)
+
+    def test_cached_page_recorded_under_view(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+        self.assertEqual(metrics.snapshot()['posts:index']['requests'], 2)
+
+    @override_settings(QUERY_BUDGETS={'posts:post_detail': 1})
+    def test_budget_exceeded_logged(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            )
+        self.assertIn('posts:post_detail', logs.output[0])
+
+    def test_metrics_view_staff_only(self):
+        url = reverse('request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json())
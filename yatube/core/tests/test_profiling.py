@@ -0,0 +1,101 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp()
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@override_settings(
+    PROFILING_ENABLED=True,
+    PROFILING_SAMPLE_RATE=1,
+    PROFILING_DIR=TEMP_PROFILING_DIR,
+    PROFILING_INTERVAL=0.001,
+)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def profiles(self, view_name='posts.index'):
+        directory = os.path.join(TEMP_PROFILING_DIR, view_name)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+        ]
+
+    def test_collapsed_profile_per_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        self.assertEqual(len(self.profiles()), 1)
+        self.assertTrue(self.profiles()[0].endswith('.collapsed'))
+        self.assertEqual(len(self.profiles('about.author')), 1)
+
+    @override_settings(PROFILING_FORMAT='pstats')
+    def test_pstats_profile(self):
+        self.client.get(reverse('posts:index'))
+        stats = pstats.Stats(self.profiles()[0])
+        self.assertTrue(any(
+            function == 'index' for _, _, function in stats.stats
+        ))
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_signed_header(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.get(url, HTTP_X_PROFILE='profile')
+        self.assertEqual(self.profiles(), [])
+        self.client.get(url, HTTP_X_PROFILE=profiling.make_token())
+        self.assertEqual(len(self.profiles()), 1)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILING_MAX_FILES=3)
+    def test_keeps_latest_files(self):
+        for _ in range(5):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(len(self.profiles()), 3)
+
+    @override_settings(PROFILING_MAX_FILES=3)
+    def test_removes_oldest_files_within_one_second(self):
+        """Удаляются самые старые профили, даже созданные в одну секунду."""
+        paths = []
+        for _ in range(5):
+            path = profiling.profile_path('view', '.txt')
+            open(path, 'w').close()
+            paths.append(path)
+        self.assertEqual(self.profiles('view'), paths[-3:])
+
+
+class StackSamplerTests(TestCase):
+    def test_collapsed_stacks(self):
+        with profiling.StackSampler(0.001) as sampler:
+            busy_loop(0.05)
+        lines = sampler.collapsed().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(f'{__name__}.busy_loop', stack.split(';'))
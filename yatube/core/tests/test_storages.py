@@ -0,0 +1,44 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storages import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_name_from_content(self):
+        digest = hashlib.sha256(b'picture').hexdigest()
+        name = self.storage.save('posts/Cat.JPG', ContentFile(b'picture'))
+        self.assertEqual(
+            name, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        )
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'picture')
+
+    def test_identical_content_stored_once(self):
+        first = self.storage.save('posts/a.gif', ContentFile(b'same'))
+        second = self.storage.save('posts/b.gif', ContentFile(b'same'))
+        other = self.storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        files = sorted(
+            name for name, _ in self.storage.iter_files('posts')
+        )
+        self.assertEqual(files, sorted([first, other]))
+
+    def test_repeated_upload_refreshes_mtime(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'same'))
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save('posts/b.gif', ContentFile(b'same'))
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
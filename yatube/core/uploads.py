@@ -0,0 +1,98 @@
+import hashlib
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку сразу во временный файл и считает её SHA-256.
+
+    Файл не держится в памяти целиком ни при каком размере, хеш готов к
+    концу загрузки (file.sha256), и хранилищу не нужно перечитывать файл.
+    Загрузка больше MAX_UPLOAD_SIZE дальше не пишется на диск, но поле
+    остаётся в request.FILES с настоящим size и пустым содержимым: форма
+    с LimitedImageField отклонит его как слишком большой, а с обычным
+    ImageField - как не картинку. Пропасть молча, как при SkipFile,
+    файл не может.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.oversized:
+            return None
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self.oversized = True
+            self.file.seek(0)
+            self.file.truncate()
+            return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file_ = super().file_complete(file_size)
+        if not self.oversized:
+            file_.sha256 = self.digest.hexdigest()
+        return file_
+
+
+class LimitedImageField(forms.ImageField):
+    """ImageField с проверкой числа пикселей по заголовку.
+
+    Pillow читает из заголовка только размеры, поэтому картинка-бомба
+    отклоняется до verify() и любого декодирования.
+    """
+
+    default_error_messages = {
+        'too_large': 'Файл больше %(limit)s.',
+        'too_many_pixels': (
+            'Картинка больше %(limit)s пикселей: %(width)s×%(height)s.'
+        ),
+    }
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return super().to_python(data)
+        if data.size is not None and data.size > settings.MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': filesizeformat(settings.MAX_UPLOAD_SIZE)},
+            )
+        self.check_pixels(data)
+        return super().to_python(data)
+
+    def check_pixels(self, data):
+        if hasattr(data, 'temporary_file_path'):
+            source = data.temporary_file_path()
+        else:
+            source = data
+        try:
+            with Image.open(source) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width = height = None
+        except Exception:
+            # Не картинка: сообщение об ошибке выдаст ImageField.
+            return
+        finally:
+            if hasattr(data, 'seek'):
+                data.seek(0)
+        if width is None or width * height > settings.MAX_IMAGE_PIXELS:
+            raise forms.ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={
+                    'limit': settings.MAX_IMAGE_PIXELS,
+                    'width': width or '?',
+                    'height': height or '?',
+                },
+            )
@@ -1,6 +1,16 @@
+import mimetypes
+import os
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from . import metrics
+from .media import cache_media, media_etag, media_path, media_response
 
 
 def page_not_found(request, exception):
@@ -19,3 +29,40 @@ def permission_denied(request, reason=''):
         {'path': request.path},
         status=HTTPStatus.FORBIDDEN
     )
+
+
+@require_safe
+def serve_media(request, path):
+    """Файлы MEDIA_ROOT: через фронтовой прокси или FileResponse.
+
+    При MEDIA_SENDFILE = 'x-accel-redirect' (nginx) или 'x-sendfile'
+    (Apache, lighttpd) Django только проверяет путь и условные заголовки,
+    а файл, включая Range, отдаёт прокси. Иначе файл отдаётся
+    FileResponse с поддержкой одиночного Range. Файлы с хешем содержимого
+    в имени кешируются клиентами на год.
+    """
+    full_path = media_path(path)
+    stat = os.stat(full_path)
+    etag = media_etag(path, stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content_type = (
+            mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        )
+        response = media_response(
+            request, path, full_path, stat, content_type
+        )
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    cache_media(response, path)
+    return response
+
+
+@staff_member_required
+def request_metrics(request):
+    """Гистограмма времени и запросов к БД по view для этого процесса."""
+    return JsonResponse(metrics.snapshot(), json_dumps_params={'indent': 2})
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import models
+
+from core.uploads import LimitedImageField
 
 from .models import Group, Post
+from .search import match_expression, matching_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +13,18 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    # Те же ограничения размера файла и числа пикселей, что на сайте.
+    formfield_overrides = {
+        models.ImageField: {'form_class': LimitedImageField},
+    }
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу FTS5 вместо LIKE '%...%' по всей таблице.
+        if not search_term.strip():
+            return queryset, False
+        if not match_expression(search_term):
+            return queryset.none(), False
+        return queryset.filter(pk__in=matching_ids(search_term)), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,89 @@
+import datetime
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+FEED_VERSION_KEY = 'posts:feed_version'
+CONTENT_VERSION_KEY = 'posts:content_version'
+FOLLOW_VERSION_KEY = 'posts:follow_version'
+TRENDING_VERSION_KEY = 'posts:trending_version'
+
+
+def _initial_version():
+    # Версия от времени, а не с единицы: если ключ версии вытеснят из
+    # кеша, новая версия не совпадёт со старыми закешированными страницами.
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        cache.add(f'{key}:modified', time.time(), None)
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    cache.set(f'{key}:modified', time.time(), None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
+
+
+def feed_version():
+    """Версия ленты главной: меняется при записи постов и групп."""
+    return get_version(FEED_VERSION_KEY)
+
+
+def content_version():
+    """Версия всего публичного контента, включая комментарии."""
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def feed_page_key(request):
+    """Часть ключа кеша, определяющая страницу ленты."""
+    if 'page' in request.GET:
+        return 'page:' + request.GET['page']
+    return 'cursor:' + request.GET.get('cursor', '')
+
+
+def conditional_page(*version_keys):
+    """Условный GET по версиям контента, без рендера шаблона.
+
+    ETag собирается из версий, id пользователя из сессии и CSRF-cookie:
+    страница авторизованного отличается от анонимной, а форма с
+    устаревшим CSRF-токеном не должна отдаваться как 304.
+    Last-Modified выставляется только запросам без сессии.
+    """
+    def etag_func(request, *args, **kwargs):
+        parts = [str(get_version(key)) for key in version_keys]
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            parts.append(str(request.session.get(SESSION_KEY, '')))
+        parts.append(request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+        return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        modified = cache.get_many(
+            [f'{key}:modified' for key in version_keys]
+        )
+        if len(modified) < len(version_keys):
+            return None
+        return datetime.datetime.fromtimestamp(
+            max(modified.values()), tz=timezone.utc
+        )
+
+    return condition(
+        etag_func=etag_func, last_modified_func=last_modified_func
+    )
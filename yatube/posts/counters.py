@@ -0,0 +1,64 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from . import groups
+from .models import AuthorStats, Comment, Group, Post, User
+from .utils import count_subquery
+
+
+def _changed(field, delta):
+    """F(field) + delta, но не меньше нуля.
+
+    Счётчик может разойтись с данными после bulk_create, update() или
+    SQL в обход сигналов, до ближайшего reconcile(). Уменьшение такого
+    счётчика не должно валить удаление на CHECK (>= 0).
+    """
+    return Greatest(F(field) + delta, 0)
+
+
+def change_author_posts(author_id, delta):
+    updated = AuthorStats.objects.filter(author=author_id).update(
+        posts_count=_changed('posts_count', delta)
+    )
+    if not updated and User.objects.filter(pk=author_id).exists():
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(author=author_id).count()
+            },
+        )
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=_changed('posts_count', delta)
+        )
+
+
+def change_post_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_changed('comments_count', delta)
+    )
+
+
+def reconcile():
+    """Пересчитывает все счётчики по фактическим данным."""
+    AuthorStats.objects.bulk_create(
+        (
+            AuthorStats(author_id=author_id)
+            for author_id in User.objects.filter(
+                stats__isnull=True, posts__isnull=False
+            ).distinct().values_list('pk', flat=True).iterator()
+        ),
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.update(
+        posts_count=count_subquery(Post.objects, 'author', outer='author')
+    )
+    Group.objects.update(posts_count=count_subquery(Post.objects, 'group'))
+    Post.objects.update(
+        comments_count=count_subquery(Comment.objects, 'post')
+    )
+    for group_id in Group.objects.values_list('pk', flat=True).iterator():
+        groups.refresh_activity(group_id)
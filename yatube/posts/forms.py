@@ -1,6 +1,8 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from core.uploads import LimitedImageField
+
 from .models import Comment, Post
 
 
@@ -8,6 +10,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': LimitedImageField}
         labels = {
             'text': _('Текст поста'),
             'group': _('Группа'),
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group, Post
+
+
+def group_key(slug):
+    return f'posts:group:{slug}'
+
+
+def get_group_or_404(slug):
+    """Группа по slug из кеша, при промахе из базы с записью в кеш.
+
+    Запись обновляется при каждом изменении группы и её статистики,
+    поэтому в кеше всегда актуальные счётчики.
+    """
+    group = cache.get(group_key(slug))
+    if group is None:
+        try:
+            group = Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise Http404('Группа не найдена')
+        cache.set(group_key(slug), group, settings.GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def cache_group(group):
+    cache.set(group_key(group.slug), group, settings.GROUP_CACHE_TIMEOUT)
+
+
+def forget_group(slug):
+    cache.delete(group_key(slug))
+
+
+def refresh_activity(group_id):
+    """Обновляет время последней записи и последние посты группы.
+
+    Последние GROUP_LATEST_POSTS постов берутся по индексу
+    post_group_pub_date_idx, без GROUP BY по всей таблице.
+    """
+    if group_id is None:
+        return
+    latest = list(
+        Post.objects.filter(group=group_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:settings.GROUP_LATEST_POSTS]
+    )
+    Group.objects.filter(pk=group_id).update(
+        last_post_at=latest[0][1] if latest else None,
+        latest_post_ids=','.join(str(pk) for pk, _ in latest),
+    )
+    group = Group.objects.filter(pk=group_id).first()
+    if group is not None:
+        cache_group(group)
+
+
+def attach_latest_posts(groups):
+    """Загружает последние посты всех групп страницы одним запросом."""
+    ids = [pk for group in groups for pk in group.latest_post_id_list]
+    posts = Post.objects.select_related('author').in_bulk(ids)
+    for group in groups:
+        group.latest_posts = [
+            posts[pk] for pk in group.latest_post_id_list if pk in posts
+        ]
+    return groups
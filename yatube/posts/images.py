@@ -0,0 +1,49 @@
+import hashlib
+
+from PIL import Image
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_format', 'image_hash')
+
+
+def read_image_metadata(file_):
+    """Размеры, формат и SHA-256 картинки за одно чтение файла.
+
+    Pillow читает только заголовок, пиксели не декодируются. Файл,
+    открытый до вызова (например, ещё не сохранённая загрузка), остаётся
+    открытым, иначе закрывается.
+    """
+    close = file_.closed
+    file_.open('rb')
+    try:
+        digest = getattr(file_.file, 'sha256', None)
+        if digest is None:
+            digest = hashlib.sha256()
+            for chunk in file_.chunks():
+                digest.update(chunk)
+            digest = digest.hexdigest()
+        file_.seek(0)
+        with Image.open(file_) as image:
+            width, height = image.size
+            image_format = image.format or ''
+    finally:
+        if close:
+            file_.close()
+        else:
+            file_.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_format': image_format,
+        'image_hash': digest,
+    }
+
+
+def store_image_metadata(post):
+    """Заполняет поля метаданных картинки поста, не сохраняя его."""
+    if post.image:
+        metadata = read_image_metadata(post.image)
+    else:
+        metadata = dict.fromkeys(METADATA_FIELDS, '')
+        metadata.update(image_width=None, image_height=None)
+    for field, value in metadata.items():
+        setattr(post, field, value)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import METADATA_FIELDS, store_image_metadata
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, формат и хеш картинок у старых постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = (
+            Post.objects.exclude(image='').filter(image_hash='')
+            .only('pk', 'image').order_by('pk')
+        )
+        batch, total, failed = [], 0, 0
+        for post in posts.iterator():
+            try:
+                store_image_metadata(post)
+            except (OSError, SyntaxError) as error:
+                failed += 1
+                self.stderr.write(f'{post.image.name}: {error}')
+                continue
+            batch.append(post)
+            if len(batch) >= batch_size:
+                total += self.save(batch)
+                batch = []
+        total += self.save(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {total}, с ошибками: {failed}'
+        ))
+
+    @staticmethod
+    def save(posts):
+        # bulk_update не отправляет сигналы: версии кешей и миниатюры
+        # от метаданных не зависят.
+        Post.objects.bulk_update(posts, METADATA_FIELDS)
+        return len(posts)
@@ -0,0 +1,143 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Comment, Group, Post, User
+from posts.utils import NEXT, CursorPaginator
+
+SEED_USERS = 1000
+SEED_GROUPS = 50
+SEED_BATCH = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время запросов лент с индексами и без них. '
+        'Все изменения в базе откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=0,
+            help='Сколько постов сгенерировать перед замером',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз выполнять каждый запрос',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['posts']:
+                self.seed(options['posts'])
+            shapes = self.query_shapes()
+            if not shapes:
+                self.stderr.write('В базе нет постов для замера')
+                return
+            self.report('с индексами', shapes, options['repeat'])
+            self.drop_indexes()
+            self.report('без индексов', shapes, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, posts):
+        self.stdout.write(f'Генерация {posts} постов...')
+        User.objects.bulk_create(
+            User(username=f'bench_user_{number}')
+            for number in range(SEED_USERS)
+        )
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {number}',
+                slug=f'bench-group-{number}',
+                description='',
+            ) for number in range(SEED_GROUPS)
+        )
+        users = list(User.objects.filter(username__startswith='bench_user_'))
+        groups = list(Group.objects.filter(slug__startswith='bench-group-'))
+        groups.append(None)
+        for start in range(0, posts, SEED_BATCH):
+            Post.objects.bulk_create(
+                Post(
+                    text=f'Пост {number}',
+                    author=random.choice(users),
+                    group=random.choice(groups),
+                ) for number in range(start, min(start + SEED_BATCH, posts))
+            )
+
+    def query_shapes(self):
+        sample = Post.objects.filter(group__isnull=False).first()
+        if sample is None:
+            return []
+        per_page = settings.SORT_PAGES
+        feeds = (
+            ('index', Post.objects.all(), 'pub_date'),
+            ('group', Post.objects.filter(group=sample.group_id), 'pub_date'),
+            (
+                'profile',
+                Post.objects.filter(author=sample.author_id),
+                'pub_date',
+            ),
+            (
+                'comments',
+                Comment.objects.filter(post=sample.pk),
+                'created',
+            ),
+        )
+        shapes = []
+        for name, queryset, key_field in feeds:
+            paginator = CursorPaginator(queryset, per_page, key_field)
+            ordered = paginator.object_list
+            shapes.append((f'{name}: первая страница', ordered[:per_page]))
+            offset = ordered.count() // 2
+            middle = ordered[offset:offset + 1].first()
+            if middle is None:
+                continue
+            shapes.append((
+                f'{name}: OFFSET в середине',
+                ordered[offset:offset + per_page],
+            ))
+            keyset = paginator.keyset(
+                NEXT, getattr(middle, key_field), middle.pk
+            )
+            shapes.append((f'{name}: курсор в середине', keyset[:per_page]))
+        return shapes
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (Post, Comment):
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        'DROP INDEX ' + connection.ops.quote_name(index.name)
+                    )
+
+    def report(self, phase, shapes, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(phase))
+        explain = (
+            'EXPLAIN QUERY PLAN '
+            if connection.vendor == 'sqlite' else 'EXPLAIN '
+        )
+        for name, queryset in shapes:
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                # Комментарий с фазой не даёт sqlite3 взять из кеша
+                # подготовленный до DROP INDEX план.
+                cursor.execute(f'{explain}{sql} /* {phase} */', params)
+                plan = [' '.join(map(str, row)) for row in cursor.fetchall()]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{name}: медиана {statistics.median(timings):.2f} мс'
+            )
+            for row in plan:
+                self.stdout.write(f'    {row}')
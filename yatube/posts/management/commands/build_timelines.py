@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить существующие записи лент перед заполнением',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            TimelineEntry.objects.all().delete()
+        follows = Follow.objects.select_related('author').order_by('pk')
+        total = 0
+        for follow in follows.iterator():
+            timeline.add_follow(follow)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано подписок: {total}'
+        ))
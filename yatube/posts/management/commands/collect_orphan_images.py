@@ -0,0 +1,79 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов, на которые не ссылается ни один пост'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help=(
+                'Не трогать файлы моложе стольких секунд: пост с только '
+                'что загруженной картинкой может быть ещё не сохранён'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        if not storage.exists(directory):
+            return
+        deadline = time.time() - options['grace']
+        batch, removed = [], 0
+        for name, modified in storage.iter_files(directory):
+            if modified < deadline:
+                batch.append(name)
+            if len(batch) >= BATCH_SIZE:
+                removed += self.collect(
+                    storage, batch, deadline, options['dry_run']
+                )
+                batch = []
+        removed += self.collect(storage, batch, deadline, options['dry_run'])
+        label = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{label} файлов: {removed}'))
+
+    def collect(self, storage, names, deadline, dry_run):
+        # Число ссылок на файл - число постов с этим именем картинки,
+        # по индексу post_image_idx.
+        referenced = set(
+            Post.objects.filter(image__in=names)
+            .values_list('image', flat=True)
+        )
+        removed = 0
+        for name in names:
+            if name in referenced or self.reuploaded(storage, name, deadline):
+                continue
+            self.stdout.write(name)
+            removed += 1
+            if not dry_run:
+                default.kvstore.delete(ImageFile(name, storage))
+                storage.delete(name)
+        return removed
+
+    def reuploaded(self, storage, name, deadline):
+        """Файл загрузили заново после обхода каталога.
+
+        Хранилище обновляет время изменения при повторной загрузке того
+        же содержимого, а ссылающийся пост может быть ещё не сохранён.
+        """
+        try:
+            return os.path.getmtime(storage.path(name)) >= deadline
+        except FileNotFoundError:
+            return True
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных картинок постов'
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'image', 'image_width', 'image_height'
+        )
+        total = 0
+        for name, width, height in images.iterator():
+            generate_thumbnails(name, (width, height))
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано картинок: {total}'))
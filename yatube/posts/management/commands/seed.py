@@ -0,0 +1,311 @@
+import contextlib
+import datetime
+import hashlib
+import io
+import random
+import time
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from django.db.models import Max, Min
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import counters, timeline, trending
+from posts.caching import (
+    CONTENT_VERSION_KEY, FEED_VERSION_KEY, FOLLOW_VERSION_KEY, bump_version
+)
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import chunks
+
+VOCABULARY_SIZE = 2000
+IMAGE_SIZES = (
+    (1920, 1080), (1280, 960), (1080, 1080), (800, 1200), (640, 480),
+    (3000, 2000),
+)
+GROUP_SHARE = 0.7
+# Показатели степени для skewed(): 1 - равномерно, чем больше, тем
+# сильнее перекос к началу диапазона.
+FOLLOW_SKEW = 3.0
+POST_SKEW = 1.5
+GROUP_SKEW = 2.0
+COMMENT_SKEW = 2.5
+# Среднее время от публикации поста до комментария.
+COMMENT_DELAY_HOURS = 6
+# Простое число больше любого числа постов: умножение на него по модулю
+# переставляет ранги популярности по всей ленте.
+SCATTER_PRIME = 2_147_483_647
+
+
+def skewed(rng, size, exponent):
+    """Случайный индекс из range(size) со степенным распределением.
+
+    P(индекс < x) = (x / size) ** (1 / exponent): несколько первых
+    индексов выпадают часто, длинный хвост - редко. Памяти не требует,
+    поэтому годится для любого числа строк.
+    """
+    return min(int(size * rng.random() ** exponent), size - 1)
+
+
+@contextlib.contextmanager
+def explicit_dates(*fields):
+    """Даёт bulk_create записать свои даты в поля с auto_now_add."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, группы, посты, подписки и комментарии '
+        'для проверки на больших объёмах. При одном --seed и пустой базе '
+        'данные одинаковы; даты отсчитываются назад от начала суток.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20000,
+            help='Сколько подписок пытаться создать; повторы отбрасываются',
+        )
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--image-share',
+            type=float,
+            default=0.1,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней распределить посты',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имён пользователей и адресов групп',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк вставлять одним bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.until = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.span = datetime.timedelta(days=options['days'])
+        self.vocabulary = self.build_vocabulary(options['seed'])
+        prefix = options['prefix']
+
+        self.users = self.stage(
+            'пользователи', User, options['users'],
+            lambda number: User(
+                username=f'{prefix}_{number}',
+                password=UNUSABLE_PASSWORD_PREFIX,
+            ),
+        )
+        self.groups = self.stage(
+            'группы', Group, options['groups'],
+            lambda number: Group(
+                title=self.text(3).rstrip('.'),
+                slug=f'{prefix}-{number}',
+                description=self.text(20),
+            ),
+        )
+        self.posts_total = options['posts']
+        self.images = self.save_images(options['image_share'])
+        self.image_share = options['image_share']
+        date_fields = (
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        )
+        with explicit_dates(*date_fields):
+            self.posts = self.stage(
+                'посты', Post, self.posts_total, self.make_post
+            )
+            self.stage(
+                'подписки', Follow, options['follows'], self.make_follow,
+                contiguous=False,
+            )
+            self.stage(
+                'комментарии', Comment, options['comments'],
+                self.make_comment,
+            )
+        self.denormalize()
+
+    def check_options(self, options):
+        for name in ('users', 'groups', 'posts', 'follows', 'comments'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} не может быть меньше нуля')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if not 0 <= options['image_share'] <= 1:
+            raise CommandError('--image-share должен быть от 0 до 1')
+        if options['posts'] and not options['users']:
+            raise CommandError('Для постов нужны пользователи')
+        if options['follows'] and options['users'] < 2:
+            raise CommandError('Для подписок нужно хотя бы два пользователя')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Для комментариев нужны посты')
+        prefix = options['prefix']
+        if (
+            User.objects.filter(username__startswith=f'{prefix}_').exists()
+            or Group.objects.filter(slug__startswith=f'{prefix}-').exists()
+        ):
+            raise CommandError(
+                f'Данные с префиксом {prefix} уже есть, задайте --prefix'
+            )
+
+    def build_vocabulary(self, seed):
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        # sorted: порядок множества строк меняется от запуска к запуску.
+        return sorted(set(fake.words(VOCABULARY_SIZE)))
+
+    def text(self, mean_words):
+        words = max(1, int(self.rng.lognormvariate(0, 0.6) * mean_words))
+        return ' '.join(
+            self.rng.choice(self.vocabulary) for _ in range(words)
+        ).capitalize() + '.'
+
+    def stage(self, title, model, count, make, contiguous=True):
+        """Вставляет count строк порциями по batch_size.
+
+        Возвращает (первый pk, число строк): bulk_create в SQLite не
+        отдаёт ключи, а новые строки одной вставки получают ключи подряд.
+        Хранить их списком не нужно, поэтому память не растёт с объёмом.
+        """
+        started = time.monotonic()
+        before = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        objects = (make(number) for number in range(count))
+        for chunk in chunks(objects, self.batch_size):
+            model.objects.bulk_create(chunk, ignore_conflicts=not contiguous)
+            # При DEBUG Django запоминает тексты запросов, а у bulk_create
+            # они большие.
+            reset_queries()
+        inserted = model.objects.filter(pk__gt=before)
+        bounds = inserted.aggregate(first=Min('pk'), last=Max('pk'))
+        total = inserted.count()
+        if contiguous and total and (
+            bounds['last'] - bounds['first'] + 1 != total or total != count
+        ):
+            raise CommandError(
+                f'{title}: ключи новых строк идут не подряд, '
+                f'похоже, в базу одновременно писал другой процесс'
+            )
+        self.stdout.write(
+            f'{title}: {total} за {time.monotonic() - started:.1f} с'
+        )
+        return bounds['first'], total
+
+    def save_images(self, share):
+        """Несколько настоящих картинок, общих для всех постов с картинкой.
+
+        Хранилище адресует файлы по содержимому, так что повторный запуск
+        их не дублирует. Миниатюры создаёт generate_thumbnails.
+        """
+        if not share or not self.posts_total:
+            return []
+        storage = Post._meta.get_field('image').storage
+        images = []
+        for width, height in IMAGE_SIZES:
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (width, height), color).save(buffer, 'JPEG')
+            content = buffer.getvalue()
+            name = storage.save('posts/seed.jpg', ContentFile(content))
+            images.append({
+                'image': name,
+                'image_width': width,
+                'image_height': height,
+                'image_format': 'JPEG',
+                'image_hash': hashlib.sha256(content).hexdigest(),
+            })
+        return images
+
+    def user_id(self, index):
+        first, _ = self.users
+        return first + index
+
+    def pub_date(self, number):
+        # Посты равномерно по времени, в порядке ключей, как в жизни.
+        return self.until - self.span + self.span * number / self.posts_total
+
+    def make_post(self, number):
+        _, users = self.users
+        first_group, groups = self.groups
+        group_id = None
+        if groups and self.rng.random() < GROUP_SHARE:
+            group_id = first_group + skewed(self.rng, groups, GROUP_SKEW)
+        image = {}
+        if self.images and self.rng.random() < self.image_share:
+            image = self.rng.choice(self.images)
+        return Post(
+            author_id=self.user_id(skewed(self.rng, users, POST_SKEW)),
+            group_id=group_id,
+            text=self.text(40),
+            pub_date=self.pub_date(number),
+            **image,
+        )
+
+    def make_follow(self, number):
+        # Популярность авторов по степенному закону: немногие набирают
+        # тысячи подписчиков, у большинства их единицы.
+        _, users = self.users
+        user = self.rng.randrange(users)
+        author = skewed(self.rng, users, FOLLOW_SKEW)
+        if author == user:
+            author = (author + 1) % users
+        return Follow(
+            user_id=self.user_id(user), author_id=self.user_id(author)
+        )
+
+    def make_comment(self, number):
+        # Комментарии сосредоточены на немногих постах, разбросанных по
+        # всей ленте, и приходят всплеском вскоре после публикации.
+        first_post, posts = self.posts
+        _, users = self.users
+        rank = skewed(self.rng, posts, COMMENT_SKEW)
+        post_number = rank * SCATTER_PRIME % posts
+        delay = datetime.timedelta(
+            hours=self.rng.expovariate(1 / COMMENT_DELAY_HOURS)
+        )
+        return Comment(
+            post_id=first_post + post_number,
+            author_id=self.user_id(self.rng.randrange(users)),
+            text=self.text(12),
+            created=min(self.pub_date(post_number) + delay, self.until),
+        )
+
+    def denormalize(self):
+        # bulk_create не отправляет сигналы: счётчики, ленты, рейтинг и
+        # версии кешей пересчитываются по данным.
+        started = time.monotonic()
+        counters.reconcile()
+        timeline.rebuild()
+        trending.update()
+        for key in (FEED_VERSION_KEY, CONTENT_VERSION_KEY, FOLLOW_VERSION_KEY):
+            bump_version(key)
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики, ленты и рейтинг пересчитаны за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
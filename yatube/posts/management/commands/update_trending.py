@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов; '
+        'запускается периодически, например cron раз в 10 минут'
+    )
+
+    def handle(self, *args, **options):
+        total = trending.update()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рейтингов: {total}'
+        ))
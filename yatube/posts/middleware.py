@@ -0,0 +1,84 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .caching import content_version
+
+BYPASS_COOKIES = (settings.SESSION_COOKIE_NAME, 'messages')
+
+
+class AnonymousPageCacheMiddleware:
+    """Полностраничный кеш публичных страниц для анонимных посетителей.
+
+    Стоит до SessionMiddleware: попадание отдаётся без загрузки сессии,
+    пользователя и рендера шаблона. Запросы с cookie сессии или сообщений
+    идут мимо кеша. Ключ включает путь, query string и версию контента,
+    которую сигналы увеличивают при записи постов, групп и комментариев.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self.cache_key(request)
+        if key is None:
+            return self.get_response(request)
+        cached = cache.get(key)
+        if cached is not None:
+            response = self.restore(cached)
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')
+                ),
+                response=response,
+            )
+        response = self.get_response(request)
+        if self.is_cacheable(request, response):
+            cache.set(
+                key, self.store(response), settings.ANON_PAGE_CACHE_TIMEOUT
+            )
+        return response
+
+    def cache_key(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if any(name in request.COOKIES for name in BYPASS_COOKIES):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in settings.ANON_PAGE_CACHE_VIEWS:
+            return None
+        url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'anon_page:{content_version()}:{url}'
+
+    @staticmethod
+    def is_cacheable(request, response):
+        user = getattr(request, 'user', None)
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not (user is not None and user.is_authenticated)
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    @staticmethod
+    def store(response):
+        return response.content, list(response.items())
+
+    @staticmethod
+    def restore(cached):
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers:
+            response[header] = value
+        return response
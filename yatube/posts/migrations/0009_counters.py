@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_subquery(queryset, field):
+    # Копия posts.utils.count_subquery: миграция не зависит от кода
+    # приложения, который со временем меняется.
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Comment = apps.get_model('posts', 'Comment')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    per_author = (
+        Post.objects.order_by().values('author').annotate(total=Count('pk'))
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=row['author'], posts_count=row['total'])
+        for row in per_author
+    )
+    Group.objects.update(posts_count=count_subquery(Post.objects, 'group'))
+    Post.objects.update(
+        comments_count=count_subquery(Comment.objects, 'post')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'счётчики автора',
+                'verbose_name_plural': 'счётчики авторов',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
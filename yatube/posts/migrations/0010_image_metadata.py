@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_format',
+            field=models.CharField(blank=True, editable=False, max_length=10, verbose_name='Формат картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='SHA-256 картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Триггеры синхронизации создаёт posts.search.install_triggers по сигналу
+# post_migrate: при пересоздании таблицы posts_post в следующих миграциях
+# SQLite удаляет их вместе со старой таблицей.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE VIRTUAL TABLE posts_post_fts USING fts5('
+                "text, content='posts_post', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            ),
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+                'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+                'DROP TRIGGER IF EXISTS posts_post_fts_update',
+                'DROP TABLE posts_post_fts',
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('updated', models.DateTimeField(verbose_name='Пересчитан')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'рейтинг поста',
+                'verbose_name_plural': 'рейтинги постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score'], name='trending_score_idx'),
+        ),
+    ]
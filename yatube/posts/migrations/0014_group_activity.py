@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:39
+
+from django.db import migrations, models
+
+LATEST_POSTS = 3
+
+
+def fill_activity(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    for group in Group.objects.all():
+        latest = list(
+            Post.objects.filter(group=group)
+            .order_by('-pub_date', '-pk')
+            .values_list('pk', 'pub_date')[:LATEST_POSTS]
+        )
+        Group.objects.filter(pk=group.pk).update(
+            last_post_at=latest[0][1] if latest else None,
+            latest_post_ids=','.join(str(pk) for pk, _ in latest),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя запись'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='latest_post_ids',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Последние записи'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-last_post_at'], name='group_last_post_at_idx'),
+        ),
+        migrations.RunPython(fill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_pub_date(apps, schema_editor):
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry.objects.update(pub_date=Subquery(
+        Post.objects.filter(pk=OuterRef('post')).values('pub_date')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(null=True, verbose_name='Дата публикации'),
+        ),
+        migrations.RunPython(fill_pub_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(verbose_name='Дата публикации'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storages import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -8,14 +10,39 @@ class Group(models.Model):
     title = models.CharField(verbose_name='Заголовок', max_length=200)
     slug = models.SlugField(verbose_name='Адрес', max_length=50, unique=True)
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+        editable=False,
+    )
+    last_post_at = models.DateTimeField(
+        verbose_name='Последняя запись',
+        blank=True, null=True,
+        editable=False,
+    )
+    latest_post_ids = models.CharField(
+        verbose_name='Последние записи',
+        max_length=200,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Группа'
         verbose_name_plural = 'Группы'
+        indexes = [
+            models.Index(
+                fields=['-last_post_at'], name='group_last_post_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def latest_post_id_list(self):
+        return [int(pk) for pk in self.latest_post_ids.split(',') if pk]
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
@@ -39,13 +66,53 @@ class Post(models.Model):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        verbose_name='Ширина картинки',
+        blank=True, null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        verbose_name='Высота картинки',
+        blank=True, null=True,
+        editable=False,
+    )
+    image_format = models.CharField(
+        verbose_name='Формат картинки',
+        max_length=10,
+        blank=True,
+        editable=False,
+    )
+    image_hash = models.CharField(
+        verbose_name='SHA-256 картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'пост'
         verbose_name_plural = 'посты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+            models.Index(fields=['image'], name='post_image_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -70,6 +137,13 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -92,3 +166,92 @@ class Follow(models.Model):
                 name='already_follow'
             )
         ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики автора."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'счётчики автора'
+        verbose_name_plural = 'счётчики авторов'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    # Копия post.pub_date: лента листается по индексу записей, без
+    # соединения с постами и сортировки всей ленты пользователя.
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'записи ленты'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+
+
+class PullAuthor(models.Model):
+    """Автор со слишком большим числом подписчиков для fan-out.
+
+    Его посты не раскладываются по лентам, а подмешиваются при чтении.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pull_author',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'автор без fan-out'
+        verbose_name_plural = 'авторы без fan-out'
+
+
+class TrendingScore(models.Model):
+    """Рейтинг свежего поста для ленты популярного."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+    updated = models.DateTimeField(verbose_name='Пересчитан')
+
+    class Meta:
+        verbose_name = 'рейтинг поста'
+        verbose_name_plural = 'рейтинги постов'
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
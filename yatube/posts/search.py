@@ -0,0 +1,135 @@
+import re
+
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .utils import NEXT, CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+SNIPPET_TOKENS = 24
+# Метки начала и конца совпадения в snippet(): управляющие символы не
+# встречаются в тексте поста, поэтому текст можно экранировать целиком.
+MARK_START, MARK_END = '\x02', '\x03'
+SCORE = f'-{FTS_TABLE}.rank'
+
+TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f'AFTER INSERT ON posts_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        f'END'
+    ),
+    f'{FTS_TABLE}_delete': (
+        f'AFTER DELETE ON posts_post BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f'END'
+    ),
+    f'{FTS_TABLE}_update': (
+        f'AFTER UPDATE OF text ON posts_post BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        f'END'
+    ),
+}
+
+
+def install_triggers(connection):
+    """Создаёт недостающие триггеры синхронизации индекса с posts_post.
+
+    SQLite пересоздаёт таблицу при многих изменениях схемы, и её триггеры
+    пропадают; поэтому функция вызывается после каждого migrate. Если
+    какого-то триггера не было, индекс перестраивается целиком.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master '
+            "WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {TRIGGERS[name]}')
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе FTS5: все слова, по префиксу.
+
+    Слова берутся в кавычки, так что операторы FTS5 в запросе не
+    работают и не могут вызвать синтаксическую ошибку.
+    """
+    terms = re.findall(r'\w+', query)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def matching_ids(query):
+    """id постов, подходящих под запрос: для фильтра pk__in."""
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(query)],
+    )
+
+
+def search_posts(queryset, query):
+    """Посты по запросу с релевантностью (search_score) и сниппетом.
+
+    search_score - bm25 с обратным знаком: чем больше, тем выше пост.
+    """
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = posts_post.id'],
+        params=[match_expression(query)],
+        select={
+            'search_score': SCORE,
+            'search_snippet': (
+                f"snippet({FTS_TABLE}, 0, %s, %s, '…', {SNIPPET_TOKENS})"
+            ),
+        },
+        select_params=[MARK_START, MARK_END],
+    ).order_by('-search_score', '-pk')
+
+
+def highlight(posts):
+    """Экранирует сниппеты и размечает совпадения тегом <mark>."""
+    for post in posts:
+        post.search_snippet = mark_safe(
+            escape(post.search_snippet)
+            .replace(MARK_START, '<mark>')
+            .replace(MARK_END, '</mark>')
+        )
+    return posts
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация выдачи поиска по (search_score, id)."""
+
+    parse_key = float
+
+    def __init__(self, object_list, per_page, prepare=highlight):
+        super().__init__(
+            object_list, per_page, key_field='search_score', prepare=prepare
+        )
+
+    def keyset(self, direction, key, pk):
+        # search_score - выражение в SELECT, а не поле модели: условия
+        # курсора задаются через extra().
+        operator = '<' if direction == NEXT else '>'
+        condition = (
+            f'({SCORE} {operator} %s '
+            f'OR ({SCORE} = %s AND posts_post.id {operator} %s))'
+        )
+        queryset = self.object_list.extra(
+            where=[condition], params=[key, key, pk]
+        )
+        return queryset if direction == NEXT else queryset.reverse()
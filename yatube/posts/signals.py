@@ -0,0 +1,169 @@
+from django.db import connections, transaction
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from . import (
+    counters, groups, images, search, thumbnails, timeline, trending
+)
+from .caching import (
+    CONTENT_VERSION_KEY, FEED_VERSION_KEY, FOLLOW_VERSION_KEY, bump_version
+)
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.add_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.remove_follow(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, **kwargs):
+    instance._old_group_id, instance._old_image = None, ''
+    if instance.pk is not None:
+        instance._old_group_id, instance._old_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group', 'image')
+            .first()
+        ) or (None, '')
+
+
+@receiver(pre_save, sender=Post)
+def read_image_metadata(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    if instance.image.name != instance._old_image or (
+        instance.image and not instance.image_hash
+    ):
+        images.store_image_metadata(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_posts(instance.author_id, 1)
+        counters.change_group_posts(instance.group_id, 1)
+    elif instance._old_group_id != instance.group_id:
+        counters.change_group_posts(instance._old_group_id, -1)
+        counters.change_group_posts(instance.group_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def refresh_group_activity(sender, instance, created, **kwargs):
+    if created or instance._old_group_id != instance.group_id:
+        groups.refresh_activity(instance.group_id)
+    if not created and instance._old_group_id != instance.group_id:
+        groups.refresh_activity(instance._old_group_id)
+
+
+@receiver(pre_save, sender=Group)
+def remember_old_slug(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk is not None:
+        instance._old_slug = (
+            Group.objects.filter(pk=instance.pk)
+            .values_list('slug', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Group)
+def cache_saved_group(sender, instance, **kwargs):
+    if instance._old_slug and instance._old_slug != instance.slug:
+        groups.forget_group(instance._old_slug)
+    groups.cache_group(instance)
+
+
+@receiver(post_delete, sender=Group)
+def forget_deleted_group(sender, instance, **kwargs):
+    groups.forget_group(instance.slug)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_author_posts(instance.author_id, -1)
+    counters.change_group_posts(instance.group_id, -1)
+
+
+# После count_deleted_post: receiver'ы вызываются в порядке регистрации,
+# а refresh_activity кладёт группу в кеш уже с уменьшенным счётчиком.
+@receiver(post_delete, sender=Post)
+def refresh_group_activity_on_delete(sender, instance, **kwargs):
+    groups.refresh_activity(instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post_comments(instance.post_id, 1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def update_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.update_post(
+            instance.pk if sender is Post else instance.post_id
+        )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def update_author_trending(sender, instance, **kwargs):
+    # Число подписчиков входит в рейтинг всех свежих постов автора.
+    trending.update_author(instance.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_caches(sender, **kwargs):
+    bump_version(CONTENT_VERSION_KEY)
+    if sender is not Comment:
+        bump_version(FEED_VERSION_KEY)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, **kwargs):
+    bump_version(FOLLOW_VERSION_KEY)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    if instance.image and instance.image.name != instance._old_image:
+        # Воркер пула читает файл и пишет в хранилище миниатюр сам, поэтому
+        # задание уходит только после фиксации: при откате поста оно не
+        # нужно, а запрос не держит транзакцию ради постановки в очередь.
+        name = instance.image.name
+        size = (instance.image_width, instance.image_height)
+        transaction.on_commit(
+            lambda: thumbnails.schedule_thumbnails(name, size)
+        )
+
+
+@receiver(post_migrate)
+def install_search_triggers(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.install_triggers(connections[using])
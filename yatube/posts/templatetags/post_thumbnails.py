@@ -0,0 +1,45 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+MIME_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+
+@register.simple_tag
+def ready_thumbnail(post, variant):
+    """{% ready_thumbnail post 'card_960_jpeg' as im %}: только готовые.
+
+    Для постов страницы ленты миниатюры уже загружены prefetch_thumbnails.
+    """
+    prefetched = getattr(post, 'ready_thumbnails', None)
+    if prefetched is not None:
+        return prefetched.get(variant)
+    return thumbnails.ready_thumbnail(post.image, variant)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def responsive_thumbnail(post, family, sizes='100vw'):
+    """{% responsive_thumbnail post 'card' %}: <picture> с srcset.
+
+    В srcset попадают только готовые варианты; пока нет ни одного
+    варианта запасного формата, выводится заглушка.
+    """
+    sources = []
+    for image_format, names in thumbnails.family_variants(family).items():
+        ready = [
+            im for im in (ready_thumbnail(post, name) for name in names) if im
+        ]
+        sources.append({
+            'type': MIME_TYPES.get(image_format, ''),
+            'srcset': ', '.join(f'{im.url} {im.width}w' for im in ready),
+            'images': ready,
+        })
+    fallback = sources.pop()
+    return {
+        'sources': [source for source in sources if source['images']],
+        'fallback': fallback,
+        'image': fallback['images'][-1] if fallback['images'] else None,
+        'sizes': sizes,
+    }
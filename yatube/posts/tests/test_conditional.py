@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug, )),
+            reverse('posts:profile', args=(self.author, )),
+            reverse('posts:post_detail', args=(self.post.id, )),
+            reverse('posts:follow_index'),
+        )
+
+    def test_matching_etag_returns_304_without_render(self):
+        """Совпавший ETag даёт 304 без шаблона и с одним запросом."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                # Первый ответ выставляет CSRF-cookie, от которой
+                # зависит ETag страниц с формой.
+                self.reader_client.get(url)
+                etag = self.reader_client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.reader_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                self.assertIsNone(response.context)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_anonymous_if_modified_since(self):
+        url = reverse('posts:index')
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_writes_change_etag(self):
+        writes = (
+            (reverse('posts:post_detail', args=(self.post.id, )),
+             lambda: Comment.objects.create(
+                 post=self.post, author=self.reader, text='Коммент')),
+            (reverse('posts:profile', args=(self.author, )),
+             lambda: Follow.objects.create(
+                 user=self.reader, author=self.author)),
+            (reverse('posts:trending'),
+             lambda: Follow.objects.filter(
+                 user=self.reader, author=self.author).delete()),
+            (reverse('posts:index'),
+             lambda: Post.objects.create(author=self.author, text='Новый')),
+        )
+        for url, write in writes:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                write()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_differs_between_users(self):
+        url = reverse('posts:index')
+        anonymous_etag = self.client.get(url)['ETag']
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=anonymous_etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Group, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def refresh(self, *objects):
+        for obj in objects:
+            obj.refresh_from_db()
+
+    def test_post_counters_follow_writes(self):
+        """Счётчики постов меняются при создании, правке и удалении."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        Post.objects.create(author=self.author, text='Без группы')
+        stats = AuthorStats.objects.get(author=self.author)
+        self.refresh(self.group)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(self.group.posts_count, 1)
+
+        post.group = self.other_group
+        post.save()
+        self.refresh(self.group, self.other_group)
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        post.delete()
+        self.refresh(stats, self.other_group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_counter_follows_writes(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Коммент'
+        )
+        self.refresh(post)
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        self.refresh(post)
+        self.assertEqual(post.comments_count, 0)
+
+    def test_delete_after_bulk_create(self):
+        """Удаление не падает, если счётчик отстал от данных."""
+        author = User.objects.create_user(username='bulk_author')
+        AuthorStats.objects.create(author=author)
+        Post.objects.bulk_create([
+            Post(author=author, text='Пост', group=self.other_group)
+        ])
+        post = Post.objects.get(author=author)
+        Comment.objects.bulk_create([
+            Comment(post=post, author=author, text='Коммент')
+        ])
+        post.comments.get().delete()
+        post.delete()
+        self.refresh(self.other_group)
+        self.assertEqual(author.stats.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_reconcile_counters_repairs_drift(self):
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.author, text='Коммент')
+        AuthorStats.objects.all().delete()
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.refresh(post, self.group, self.other_group)
+        self.assertEqual(self.author.stats.posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.other_group.posts_count, 0)
+        self.assertEqual(post.comments_count, 1)
+
+    def test_profile_uses_counter(self):
+        Post.objects.create(author=self.author, text='Пост')
+        AuthorStats.objects.filter(author=self.author).update(posts_count=5)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author, ))
+        )
+        self.assertEqual(response.context['posts_count'], 5)
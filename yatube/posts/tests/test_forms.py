@@ -1,9 +1,12 @@
 from http import HTTPStatus
+import hashlib
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
@@ -17,6 +20,15 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 REVERSE_NAME = reverse('posts:post_create')
 
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
@@ -109,3 +121,87 @@ class PostFormTests(TestCase):
         response = self.client.get(REVERSE_NAME)
         self.assertRedirects(response, '/auth/login/?next=/create/')
         self.assertEqual(Post.objects.count(), posts_count)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadLimitsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def upload(self):
+        return self.post_author.post(REVERSE_NAME, data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        })
+
+    def test_upload_hashed_while_streaming(self):
+        with mock.patch('posts.images.hashlib') as images_hashlib, \
+                mock.patch('core.storages.hashlib') as storage_hashlib:
+            self.upload()
+        images_hashlib.sha256.assert_not_called()
+        storage_hashlib.sha256.assert_not_called()
+        post = Post.objects.get()
+        self.assertEqual(
+            post.image_hash, hashlib.sha256(SMALL_GIF).hexdigest()
+        )
+        self.assertIn(post.image_hash, post.image.name)
+
+    @override_settings(MAX_UPLOAD_SIZE=40)
+    def test_too_large_upload_rejected(self):
+        response = self.upload()
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 40\xa0байт.'
+        )
+
+    @override_settings(MAX_IMAGE_PIXELS=1)
+    def test_too_many_pixels_rejected(self):
+        with mock.patch('PIL.Image.Image.verify') as verify:
+            response = self.upload()
+        verify.assert_not_called()
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка больше 1 пикселей: 2×1.',
+        )
+
+    def admin_upload(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        return self.client.post(reverse('admin:posts_post_add'), data={
+            'text': 'Пост из админки',
+            'author': self.author.pk,
+            'image': SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        })
+
+    @override_settings(MAX_UPLOAD_SIZE=40)
+    def test_too_large_upload_rejected_in_admin(self):
+        """Слишком большой файл не теряется молча и в админке."""
+        response = self.admin_upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.exists())
+        self.assertContains(response, 'Файл больше 40\xa0байт.')
+
+    @override_settings(MAX_IMAGE_PIXELS=1)
+    def test_too_many_pixels_rejected_in_admin(self):
+        response = self.admin_upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.exists())
+        self.assertContains(response, 'Картинка больше 1 пикселей: 2×1.')
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.groups import get_group_or_404
+from posts.models import Group, Post, User
+
+
+class GroupsDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        self.other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание'
+        )
+
+    def test_activity_follows_post_writes(self):
+        posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {number}', group=self.group
+            )
+            for number in range(settings.GROUP_LATEST_POSTS + 1)
+        ]
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post_at, posts[-1].pub_date)
+        latest = [post.pk for post in reversed(posts)]
+        self.assertEqual(
+            self.group.latest_post_id_list,
+            latest[:settings.GROUP_LATEST_POSTS],
+        )
+        posts[-1].group = self.other_group
+        posts[-1].save()
+        posts[-2].delete()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(
+            self.group.latest_post_id_list,
+            [post.pk for post in reversed(posts[:-2])],
+        )
+        self.assertEqual(self.other_group.latest_post_id_list, [posts[-1].pk])
+
+    def test_directory_page(self):
+        Post.objects.create(
+            author=self.author, text='Старый', group=self.group
+        )
+        Post.objects.create(
+            author=self.author, text='Новый', group=self.other_group
+        )
+        cache.clear()
+        # Страница групп, COUNT пагинатора и последние посты всех групп.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:groups'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.other_group, self.group])
+        self.assertEqual(groups[0].latest_posts[0].text, 'Новый')
+        self.assertContains(response, 'Записей: 1')
+
+    def test_group_resolved_from_cache(self):
+        get_group_or_404(self.group.slug)
+        with self.assertNumQueries(0):
+            group = get_group_or_404(self.group.slug)
+        self.assertEqual(group, self.group)
+        self.group.title = 'Новое название'
+        self.group.save()
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+        group = get_group_or_404(self.group.slug)
+        self.assertEqual(group.title, 'Новое название')
+        self.assertEqual(group.posts_count, 1)
+
+    def test_cached_count_after_post_delete(self):
+        """После удаления поста в кеше уже уменьшенный счётчик."""
+        post = Post.objects.create(
+            author=self.author, text='Первый', group=self.group
+        )
+        Post.objects.create(
+            author=self.author, text='Второй', group=self.group
+        )
+        get_group_or_404(self.group.slug)
+        post.delete()
+        self.assertEqual(get_group_or_404(self.group.slug).posts_count, 1)
+
+    def test_renamed_slug_not_served_from_cache(self):
+        old_url = reverse('posts:group_list', args=(self.group.slug, ))
+        self.client.get(old_url)
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
@@ -0,0 +1,133 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def assert_metadata(self, post):
+        self.assertEqual(
+            (
+                post.image_width, post.image_height,
+                post.image_format, post.image_hash,
+            ),
+            (2, 1, 'GIF', hashlib.sha256(SMALL_GIF).hexdigest()),
+        )
+
+    def test_metadata_stored_on_upload(self):
+        post = self.create_post()
+        post.refresh_from_db()
+        self.assert_metadata(post)
+        with post.image.open() as image:
+            self.assertEqual(image.read(), SMALL_GIF)
+
+    def test_metadata_cleared_with_image(self):
+        post = self.create_post()
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_hash, '')
+
+    def test_backfill_command(self):
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None,
+            image_format='', image_hash='',
+        )
+        Post.objects.create(author=self.author, text='Без картинки')
+        out = StringIO()
+        call_command('backfill_image_metadata', stdout=out)
+        self.assertIn('Обработано картинок: 1', out.getvalue())
+        post.refresh_from_db()
+        self.assert_metadata(post)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class OrphanImagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content=SMALL_GIF):
+        return Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', content, content_type='image/gif'
+            ),
+        )
+
+    def test_same_upload_shares_file(self):
+        first = self.create_post()
+        second = self.create_post()
+        self.assertEqual(first.image.name, second.image.name)
+
+    def test_collect_orphans(self):
+        shared = self.create_post()
+        self.create_post()
+        storage = shared.image.storage
+        orphan = storage.save('posts/lost.gif', ContentFile(b'lost'))
+        shared.delete()
+        out = StringIO()
+        call_command('collect_orphan_images', stdout=out)
+        self.assertIn('Удалено файлов: 0', out.getvalue())
+        call_command('collect_orphan_images', '--grace=-1', stdout=out)
+        self.assertFalse(storage.exists(orphan))
+        self.assertTrue(storage.exists(shared.image.name))
+
+    def test_collect_skips_file_uploaded_after_listing(self):
+        """Файл, загруженный заново после обхода каталога, не удаляется."""
+        storage = Post._meta.get_field('image').storage
+        orphan = storage.save('posts/lost.gif', ContentFile(b'lost'))
+        with mock.patch.object(
+            type(storage), 'iter_files', return_value=[(orphan, 0)]
+        ):
+            call_command('collect_orphan_images', stdout=StringIO())
+        self.assertTrue(storage.exists(orphan))
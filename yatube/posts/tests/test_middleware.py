@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=(self.post.id, ))
+
+    def test_anonymous_hit_skips_view(self):
+        """Повторный анонимный запрос отдаётся из кеша без запросов к БД."""
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+        self.assertIsNone(second.context)
+        self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'cursor': 'x'})
+        self.assertIsNotNone(response.context)
+
+    def test_comment_invalidates_page(self):
+        self.client.get(self.url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый коммент'
+        )
+        self.assertContains(self.client.get(self.url), 'Новый коммент')
+
+    def test_authorized_user_is_not_cached(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.url)
+        self.assertIsNotNone(client.get(self.url).context)
+        self.assertIsNotNone(self.client.get(self.url).context)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 
 from ..models import Group, Post
@@ -60,3 +61,19 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).verbose_name, expected_value)
+
+    def test_feeds_use_composite_indexes(self):
+        """Ленты группы и автора читаются по составным индексам."""
+        feeds = (
+            (self.group.posts.all(), 'post_group_pub_date_idx'),
+            (self.user.posts.all(), 'post_author_pub_date_idx'),
+            (self.post.comments.order_by('-created'),
+             'comment_post_created_idx'),
+        )
+        for queryset, index in feeds:
+            with self.subTest(index=index):
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                    plan = str(cursor.fetchall())
+                self.assertIn(index, plan)
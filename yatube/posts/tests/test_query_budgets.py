@@ -0,0 +1,170 @@
+import itertools
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.testing import QueryCountMixin
+from posts import trending
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_PAGE = 3
+LARGE_PAGE = 30
+
+numbers = itertools.count()
+
+
+def seed(author, reader, group, post, size):
+    """Добавляет по size постов, комментариев, подписок и групп.
+
+    Данные растут вокруг одних и тех же объектов: ленты группы, автора
+    и читателя, комментариев к посту, подписчиков автора.
+    """
+    for _ in range(size):
+        number = next(numbers)
+        other = mixer.blend(User, username=f'user_{number}')
+        Follow.objects.create(user=other, author=author)
+        Follow.objects.create(user=reader, author=other)
+        mixer.blend(
+            Post, author=other, text=mixer.faker.sentence,
+            group=mixer.blend(Group, slug=f'group_{number}'),
+        )
+        mixer.blend(Post, author=author, group=group, text='Ещё пост')
+        mixer.blend(
+            Comment, post=post, author=other, text=mixer.faker.sentence
+        )
+    trending.update()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(QueryCountMixin, TestCase):
+    """Число запросов view из posts/urls.py не зависит от объёма данных.
+
+    Кеш очищается перед каждым запросом: считаются запросы самого view,
+    а не попадание в кеш страницы или фрагмента.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост'
+        )
+        seed(cls.author, cls.reader, cls.group, cls.post, LARGE_PAGE + 5)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def get(self, client, url):
+        def request():
+            cache.clear()
+            response = client.get(url)
+            self.assertLess(response.status_code, 400, url)
+        return request
+
+    def add_comment(self):
+        cache.clear()
+        self.reader_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+
+    def follow_and_unfollow(self):
+        cache.clear()
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            self.reader_client.get(reverse(name, args=['author']))
+
+    def requests(self):
+        """{view: функция, выполняющая запрос к нему} для всех view."""
+        public = {
+            'posts:index': reverse('posts:index'),
+            'posts:groups': reverse('posts:groups'),
+            'posts:group_list': reverse('posts:group_list', args=['group']),
+            'posts:search': reverse('posts:search') + '?q=пост',
+            'posts:trending': reverse('posts:trending'),
+            'posts:profile': reverse('posts:profile', args=['author']),
+            'posts:post_detail': reverse(
+                'posts:post_detail', args=[self.post.pk]
+            ),
+            'posts:post_comments': reverse(
+                'posts:post_comments', args=[self.post.pk]
+            ),
+        }
+        requests = {
+            f'{name} (аноним)': self.get(self.client, url)
+            for name, url in public.items()
+        }
+        requests.update(
+            (name, self.get(self.reader_client, url))
+            for name, url in public.items()
+        )
+        requests.update({
+            'posts:follow_index': self.get(
+                self.reader_client, reverse('posts:follow_index')
+            ),
+            'posts:post_create': self.get(
+                self.author_client, reverse('posts:post_create')
+            ),
+            'posts:post_edit': self.get(
+                self.author_client,
+                reverse('posts:post_edit', args=[self.post.pk]),
+            ),
+            'posts:add_comment': self.add_comment,
+            'posts:profile_follow': self.follow_and_unfollow,
+        })
+        return requests
+
+    def test_all_views_covered(self):
+        from posts.urls import urlpatterns
+        covered = {name.split(' ')[0] for name in self.requests()}
+        covered.add('posts:profile_unfollow')
+        self.assertEqual(
+            covered, {f'posts:{pattern.name}' for pattern in urlpatterns}
+        )
+
+    def test_queries_do_not_grow_with_data(self):
+        self.assertQueriesStable(
+            self.requests(),
+            lambda: seed(
+                self.author, self.reader, self.group, self.post,
+                2 * LARGE_PAGE,
+            ),
+        )
+
+    def override_page_size(self, size):
+        # Не декоратор и не with: размер меняется посреди проверки, а
+        # addCleanup снимает переопределения в обратном порядке.
+        override = override_settings(SORT_PAGES=size, COMMENTS_PER_PAGE=size)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_queries_do_not_grow_with_page_size(self):
+        self.override_page_size(SMALL_PAGE)
+        self.assertQueriesStable(
+            self.requests(), lambda: self.override_page_size(LARGE_PAGE)
+        )
+
+    def test_budgets(self):
+        for name, func in self.requests().items():
+            if name in settings.QUERY_BUDGETS:
+                with self.subTest(view=name):
+                    self.assertMaxQueries(settings.QUERY_BUDGETS[name], func)
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import install_triggers, search_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.cat = Post.objects.create(
+            author=cls.author, text='Кот спит на <b>диване</b>'
+        )
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кот, кот и ещё раз кот'
+        )
+        cls.dog = Post.objects.create(author=cls.author, text='Собака')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        return list(search_posts(Post.objects.all(), query))
+
+    def test_ranked_results(self):
+        self.assertEqual(self.search('кот'), [self.cats, self.cat])
+        self.assertEqual(self.search('кот диван'), [self.cat])
+        self.assertEqual(self.search('" OR NEAR('), [])
+
+    def test_index_follows_post_changes(self):
+        dog = Post.objects.get(pk=self.dog.pk)
+        dog.text = 'Собака и кот'
+        dog.save()
+        self.assertIn(dog, self.search('кот'))
+        Post.objects.filter(pk=self.cat.pk).update(text='Пусто')
+        Post.objects.filter(pk=self.cats.pk).delete()
+        self.assertEqual(self.search('кот'), [dog])
+
+    def test_search_page_snippets_are_escaped(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'диван'})
+        self.assertContains(
+            response, '&lt;b&gt;<mark>диване</mark>&lt;/b&gt;'
+        )
+        self.assertNotContains(response, 'Собака')
+
+    def test_search_cursor_pagination(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Кот номер {number}')
+            for number in range(settings.SORT_PAGES + 3)
+        )
+        url = reverse('posts:search')
+        first = self.client.get(url, {'q': 'кот'}).context['page_obj']
+        second = self.client.get(
+            url, {'q': 'кот', 'cursor': first.next_cursor}
+        ).context['page_obj']
+        seen = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(
+            seen, [post.pk for post in self.search('кот')]
+        )
+        self.assertEqual(len(set(seen)), settings.SORT_PAGES + 5)
+        self.assertFalse(second.has_next())
+        back = self.client.get(
+            url, {'q': 'кот', 'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_missing_triggers_restored(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER posts_post_fts_insert')
+        Post.objects.create(author=self.author, text='Кот без триггера')
+        install_triggers(connection)
+        self.assertEqual(len(self.search('триггера')), 1)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'диван'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cat]
+        )
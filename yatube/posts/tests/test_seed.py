@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry, User
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SIZES = {
+    'users': 40,
+    'groups': 5,
+    'posts': 300,
+    'follows': 200,
+    'comments': 400,
+    'image_share': 0.2,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TIMELINE_FANOUT_LIMIT=20)
+class SeedCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), **{**SIZES, **options})
+
+    def test_creates_rows(self):
+        self.seed(batch_size=64)
+        self.assertEqual(User.objects.count(), SIZES['users'])
+        self.assertEqual(Group.objects.count(), SIZES['groups'])
+        self.assertEqual(Post.objects.count(), SIZES['posts'])
+        self.assertEqual(Comment.objects.count(), SIZES['comments'])
+        self.assertGreater(Follow.objects.count(), 0)
+        self.assertFalse(Follow.objects.filter(
+            user=F('author')
+        ).exists())
+
+    def test_deterministic_by_seed(self):
+        def snapshot(prefix):
+            users = User.objects.filter(username__startswith=f'{prefix}_')
+            first = users.order_by('pk').first().pk
+            return [
+                (author_id - first, text, pub_date)
+                for author_id, text, pub_date in Post.objects.filter(
+                    author__in=users
+                ).order_by('pk').values_list('author', 'text', 'pub_date')
+            ]
+
+        self.seed(seed=7, prefix='first', follows=0, comments=0)
+        self.seed(seed=7, prefix='second', follows=0, comments=0)
+        self.seed(seed=8, prefix='third', follows=0, comments=0)
+        self.assertEqual(snapshot('first'), snapshot('second'))
+        self.assertNotEqual(snapshot('first'), snapshot('third'))
+
+    def test_skewed_distributions(self):
+        self.seed()
+        followers = list(
+            Follow.objects.values('author').annotate(total=Count('pk'))
+            .order_by('-total').values_list('total', flat=True)
+        )
+        self.assertGreater(followers[0], 5 * followers[len(followers) // 2])
+        comments = list(
+            Post.objects.order_by('-comments_count')
+            .values_list('comments_count', flat=True)
+        )
+        self.assertGreater(comments[0], 10 * comments[len(comments) // 2])
+
+    def test_denormalized_data_is_consistent(self):
+        self.seed()
+        for stats in AuthorStats.objects.all():
+            self.assertEqual(
+                stats.posts_count,
+                Post.objects.filter(author=stats.author_id).count(),
+            )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        follow = Follow.objects.filter(
+            author__pull_author__isnull=True, author__posts__isnull=False
+        ).first()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=follow.user_id, post__author=follow.author_id
+        ).exists())
+        group = Group.objects.exclude(last_post_at=None).first()
+        self.assertEqual(
+            group.latest_post_id_list[0],
+            group.posts.order_by('-pub_date', '-pk').first().pk,
+        )
+
+    def test_images(self):
+        self.seed()
+        posts = Post.objects.exclude(image='')
+        self.assertTrue(posts.exists())
+        post = posts.first()
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(post.image_format, 'JPEG')
+        self.assertEqual(post.image.width, post.image_width)
+
+    def test_prefix_must_be_new(self):
+        self.seed(follows=0, comments=0)
+        with self.assertRaises(CommandError):
+            self.seed(follows=0, comments=0)
@@ -0,0 +1,135 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.testing import run_on_commit
+from posts.models import Post, User
+from posts.thumbnails import prefetch_thumbnails, ready_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self):
+        with run_on_commit():
+            return Post.objects.create(
+                author=self.author,
+                text='Пост с картинкой',
+                image=SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+
+    def test_thumbnails_scheduled_after_commit(self):
+        """Генерация миниатюр ставится в очередь только после фиксации."""
+        with mock.patch('posts.thumbnails.schedule_thumbnails') as schedule:
+            with run_on_commit():
+                post = Post.objects.create(
+                    author=self.author,
+                    text='Пост с картинкой',
+                    image=SimpleUploadedFile(
+                        'small.gif', SMALL_GIF, content_type='image/gif'
+                    ),
+                )
+                schedule.assert_not_called()
+        schedule.assert_called_once_with(post.image.name, (2, 1))
+
+    def test_thumbnail_generated_on_save(self):
+        """Миниатюра создаётся при сохранении поста."""
+        post = self.create_post()
+        thumbnail = ready_thumbnail(post.image, 'card_960_jpeg')
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.id, ))
+        )
+        self.assertContains(response, thumbnail.url)
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        with mock.patch('posts.thumbnails.schedule_thumbnails') as schedule:
+            post = self.create_post()
+        schedule.assert_called_once_with(post.image.name, (2, 1))
+        self.assertIsNone(ready_thumbnail(post.image, 'card_960_jpeg'))
+        with mock.patch('sorl.thumbnail.base.ThumbnailBackend.get_thumbnail') \
+                as get_thumbnail:
+            response = self.client.get(reverse('posts:index'))
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, 'bg-light')
+
+    def test_prefetch_thumbnails_in_one_query(self):
+        """Миниатюры страницы читаются из базы sorl одним запросом."""
+        posts = [self.create_post() for _ in range(3)]
+        cache.clear()
+        posts = list(Post.objects.filter(pk__in=[p.pk for p in posts]))
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(posts)
+        for post in posts:
+            self.assertEqual(
+                post.ready_thumbnails['card_960_jpeg'].url,
+                ready_thumbnail(post.image, 'card_960_jpeg').url,
+            )
+        with self.assertNumQueries(0):
+            prefetch_thumbnails(posts)
+
+    def test_feed_page_does_not_look_up_thumbnails_per_post(self):
+        for _ in range(3):
+            self.create_post()
+        with mock.patch('sorl.thumbnail.default.kvstore.get') as get:
+            response = self.client.get(reverse('posts:index'))
+        get.assert_not_called()
+        for post in response.context['page_obj']:
+            thumbnail = post.ready_thumbnails['card_960_jpeg']
+            self.assertContains(response, thumbnail.url)
+
+    def test_source_size_taken_from_post(self):
+        """Размеры оригинала попадают в sorl из полей поста."""
+        with mock.patch('posts.thumbnails.get_thumbnail'):
+            post = self.create_post()
+        source = default.kvstore.get(ImageFile(post.image))
+        self.assertEqual(
+            tuple(source.size), (post.image_width, post.image_height)
+        )
+
+    def test_responsive_srcset(self):
+        """Карточка отдаёт WebP и JPEG всех ширин с размерами."""
+        post = self.create_post()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<source type="image/webp"')
+        for width in settings.POST_THUMBNAIL_WIDTHS:
+            for image_format in ('webp', 'jpeg'):
+                thumbnail = ready_thumbnail(
+                    post.image, f'card_{width}_{image_format}'
+                )
+                self.assertEqual(thumbnail.width, width)
+                self.assertContains(response, f'{thumbnail.url} {width}w')
+        self.assertContains(response, 'width="1440" height="508"')
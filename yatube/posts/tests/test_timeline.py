@@ -0,0 +1,142 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, PullAuthor, TimelineEntry, User
+from posts.timeline import TimelinePaginator, timeline_posts
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_follow_fills_timeline(self):
+        """Подписка раскладывает старые и новые посты автора в ленту."""
+        old_post = Post.objects.create(author=self.author, text='Старый')
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=(self.author, ))
+        )
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        Post.objects.create(author=self.stranger, text='Чужой')
+        self.assertEqual(
+            set(timeline_posts(self.reader)), {old_post, new_post}
+        )
+
+    @override_settings(TIMELINE_BACKFILL_SIZE=2)
+    def test_follow_backfills_latest_posts(self):
+        """Подписка кладёт в ленту только последние посты автора."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(4)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(set(timeline_posts(self.reader)), set(posts[-2:]))
+
+    def test_unfollow_clears_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=(self.author, ))
+        )
+        self.assertFalse(timeline_posts(self.reader).exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_cannot_follow_yourself(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(reverse('posts:profile_follow', args=(self.author, )))
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора подмешиваются при чтении."""
+        Follow.objects.create(user=self.stranger, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertTrue(
+            PullAuthor.objects.filter(author=self.author).exists()
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        self.assertEqual(list(timeline_posts(self.reader)), [post])
+
+    def test_build_timelines_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        TimelineEntry.objects.all().delete()
+        call_command('build_timelines', stdout=StringIO())
+        self.assertEqual(list(timeline_posts(self.reader)), [post])
+
+    @override_settings(TIMELINE_BACKFILL_SIZE=2)
+    def test_rebuild_backfills_latest_posts(self):
+        """rebuild() кладёт в ленту столько же постов, сколько подписка."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(4)
+        ]
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild()
+        self.assertEqual(set(timeline_posts(self.reader)), set(posts[-2:]))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_paginator_merges_entries_and_pulled_posts(self):
+        """Страницы ленты идут по (pub_date, id) в обе стороны."""
+        celebrity = User.objects.create_user(username='celebrity')
+        Follow.objects.create(user=self.stranger, author=celebrity)
+        Follow.objects.create(user=self.reader, author=celebrity)
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(
+                author=celebrity if number % 3 else self.author,
+                text=f'Пост {number}',
+            )
+            for number in range(7)
+        ]
+        # Запись ленты от времён, когда автор ещё не был pull.
+        TimelineEntry.objects.create(
+            user=self.reader, post=posts[1], pub_date=posts[1].pub_date
+        )
+        expected = sorted(
+            posts, key=lambda post: (post.pub_date, post.pk), reverse=True
+        )
+        paginator = TimelinePaginator(self.reader, 3)
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual(
+            [post for page in pages for post in page.object_list], expected
+        )
+        self.assertEqual(
+            [len(page.object_list) for page in pages], [3, 3, 1]
+        )
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(previous.object_list, pages[1].object_list)
+        self.assertTrue(previous.has_previous())
+
+    def test_follow_index_pages(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        with self.settings(SORT_PAGES=2):
+            response = self.reader_client.get(reverse('posts:follow_index'))
+            page = response.context['page_obj']
+            self.assertEqual(len(page.object_list), 2)
+            response = self.reader_client.get(
+                reverse('posts:follow_index'), {'cursor': page.next_cursor}
+            )
+        self.assertEqual(
+            response.context['page_obj'].object_list[0].text, 'Пост 0'
+        )
@@ -0,0 +1,94 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Follow, Post, TrendingScore, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_score_decays_and_grows(self):
+        now = timezone.now()
+        hour = datetime.timedelta(hours=1)
+        self.assertGreater(
+            trending.score(3, 0, now, now), trending.score(1, 0, now, now)
+        )
+        self.assertGreater(
+            trending.score(0, 100, now, now), trending.score(0, 1, now, now)
+        )
+        self.assertGreater(
+            trending.score(3, 0, now, now),
+            trending.score(3, 0, now - 10 * hour, now),
+        )
+
+    def test_comments_update_ranking(self):
+        quiet = Post.objects.create(author=self.author, text='Тихий пост')
+        discussed = Post.objects.create(author=self.author, text='Спорный')
+        self.assertEqual(TrendingScore.objects.count(), 2)
+        for number in range(3):
+            Comment.objects.create(
+                post=discussed, author=self.reader, text=f'Ответ {number}'
+            )
+        self.assertEqual(list(trending.trending_posts()), [discussed, quiet])
+
+    def test_update_uses_followers_and_drops_old_posts(self):
+        Follow.objects.create(user=self.reader, author=self.popular)
+        plain = Post.objects.create(author=self.author, text='Обычный')
+        followed = Post.objects.create(author=self.popular, text='Звёздный')
+        old = Post.objects.create(author=self.author, text='Старый')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=30)
+        )
+        out = StringIO()
+        call_command('update_trending', stdout=out)
+        self.assertIn('Пересчитано рейтингов: 2', out.getvalue())
+        self.assertFalse(TrendingScore.objects.filter(post=old).exists())
+        self.assertEqual(list(trending.trending_posts()), [followed, plain])
+
+    def test_follow_rescores_author_posts(self):
+        post = Post.objects.create(author=self.popular, text='Пост')
+        before = TrendingScore.objects.get(post=post).score
+        Follow.objects.create(user=self.reader, author=self.popular)
+        self.assertGreater(TrendingScore.objects.get(post=post).score, before)
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_update_rescores_only_possible_top(self):
+        """Посты ниже первых TRENDING_SIZE по рейтингу не пересчитываются."""
+        quiet = Post.objects.create(author=self.author, text='Тихий')
+        discussed = Post.objects.create(author=self.author, text='Спорный')
+        Comment.objects.create(post=discussed, author=self.reader, text='Да')
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(trending.update(later), 1)
+        self.assertEqual(
+            TrendingScore.objects.get(post=discussed).updated, later
+        )
+        self.assertLess(TrendingScore.objects.get(post=quiet).updated, later)
+
+    def test_update_scores_posts_without_rating(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        TrendingScore.objects.all().delete()
+        trending.update()
+        self.assertTrue(TrendingScore.objects.filter(post=post).exists())
+
+    def test_trending_page_single_query(self):
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(len(response.context['post_list']), 3)
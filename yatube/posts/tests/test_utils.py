@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.utils import CursorPaginator, decode_cursor
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.author,
+                text=f'Тестовый пост {page}',
+                group=cls.group,
+            ) for page in range(settings.TEST_SORT_PAGES)
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Переход по курсорам проходит все посты без повторов."""
+        paginator = CursorPaginator(Post.objects.all(), settings.SORT_PAGES)
+        first = paginator.get_page(None)
+        self.assertEqual(len(first), settings.SORT_PAGES)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(
+            len(second), settings.TEST_SORT_PAGES - settings.SORT_PAGES
+        )
+        self.assertFalse(second.has_next())
+        seen = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True))
+        )
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        paginator = CursorPaginator(Post.objects.all(), settings.SORT_PAGES)
+        self.assertEqual(
+            list(paginator.get_page('not-a-cursor')),
+            list(paginator.get_page(None))
+        )
+
+    def test_cursor_page_runs_no_count_query(self):
+        """Курсорная страница не выполняет COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse('posts:group_list', args=(self.group.slug, ))
+            )
+        self.assertTrue(response.context['page_obj'].has_next())
+        for query in queries.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('COUNT(', query['sql'].upper())
@@ -1,10 +1,13 @@
 from django.conf import settings
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 
 class PostViewsTests(TestCase):
@@ -152,3 +155,83 @@ class PaginatorViewsTest(TestCase):
                             len(response.context.get('page_obj')),
                             posts_count
                         )
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentsViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.other_post = Post.objects.create(author=cls.author, text='Другой')
+        Comment.objects.create(
+            post=cls.other_post, author=cls.author, text='Чужой коммент'
+        )
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Коммент {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_only_post_comments(self):
+        """На странице поста только его комментарии, первой порцией."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id, ))
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 2)
+        self.assertTrue(comments.has_next())
+        for comment in comments:
+            with self.subTest(comment=comment.text):
+                self.assertEqual(comment.post, self.post)
+        self.assertNotContains(response, 'Чужой коммент')
+
+    def test_post_comments_returns_next_batch(self):
+        first = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id, ))
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', args=(self.post.id, )),
+            {'cursor': first.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 1)
+        self.assertFalse(comments.has_next())
+        self.assertNotIn(comments[0], list(first))
+
+
+class IndexCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Тестовый пост {page}')
+            for page in range(settings.TEST_SORT_PAGES)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_index_skips_feed_query(self):
+        """Повторный запрос главной берёт ленту из кеша."""
+        self.client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Тестовый пост')
+        self.assertEqual(len(queries), 0)
+
+    def test_pages_are_cached_separately(self):
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertNotEqual(first.content, second.content)
+
+    def test_new_post_invalidates_cache(self):
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
@@ -0,0 +1,187 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import \
+    KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .caching import CONTENT_VERSION_KEY, FEED_VERSION_KEY, bump_version
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _init_worker():
+    django.setup()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def generate_thumbnails(name, size=None):
+    """Создаёт все варианты миниатюр из POST_THUMBNAILS для файла.
+
+    Известные размеры оригинала (size) заранее кладутся в хранилище sorl,
+    чтобы он не открывал файл только ради них. Закешированные страницы
+    показывают заглушку вместо миниатюры, поэтому после генерации их
+    версии сбрасываются.
+    """
+    # Хранилище оригинала входит в ключ sorl: строка name дала бы
+    # default_storage и другие имена миниатюр, чем у post.image.
+    source = ImageFile(name, Post._meta.get_field('image').storage)
+    if size is not None and None not in size:
+        source.set_size(size)
+        default.kvstore.get_or_set(source)
+    for geometry, options in settings.POST_THUMBNAILS.values():
+        get_thumbnail(source, geometry, **options)
+    bump_version(FEED_VERSION_KEY)
+    bump_version(CONTENT_VERSION_KEY)
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error(
+            'Не удалось создать миниатюры', exc_info=future.exception()
+        )
+
+
+def _workers_available():
+    # База SQLite в памяти видна только этому процессу: воркерам
+    # некуда записать результат в хранилище sorl.
+    connection = connections[DEFAULT_DB_ALIAS]
+    in_memory = (
+        connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    )
+    return settings.THUMBNAIL_WORKERS and not in_memory
+
+
+def schedule_thumbnails(name, size=None):
+    """Ставит генерацию миниатюр в пул процессов.
+
+    При THUMBNAIL_WORKERS = 0 миниатюры создаются сразу, в этом процессе.
+    """
+    if not _workers_available():
+        generate_thumbnails(name, size)
+        return
+    _get_executor().submit(
+        generate_thumbnails, name, size
+    ).add_done_callback(_log_failure)
+
+
+def _thumbnail_file(file_, variant):
+    """ImageFile миниатюры с тем же именем, что даёт get_thumbnail."""
+    geometry, options = settings.POST_THUMBNAILS[variant]
+    options = dict(options)
+    backend = default.backend
+    source = ImageFile(file_)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def ready_thumbnail(file_, variant):
+    """Готовая миниатюра из хранилища sorl или None, без генерации.
+
+    Имя миниатюры вычисляется так же, как в ThumbnailBackend.get_thumbnail.
+    """
+    if not file_:
+        return None
+    return default.kvstore.get(_thumbnail_file(file_, variant))
+
+
+def _get_many_raw(kvstore, keys):
+    """Сырые значения хранилища sorl по ключам: кеш, затем одна выборка.
+
+    Повторяет KVStore._get_raw из cached_db_kvstore, но для всех ключей
+    сразу; промахи кешируются так же, значением EMPTY_VALUE.
+    """
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        values.update(fetched)
+    return {
+        key: value for key, value in values.items()
+        if value is not EMPTY_VALUE and value
+    }
+
+
+def prefetch_thumbnails(posts):
+    """Загружает готовые миниатюры для списка постов одним обращением.
+
+    Результат кладётся в post.ready_thumbnails: {вариант: ImageFile или
+    None}; тег ready_thumbnail берёт его оттуда вместо отдельного
+    запроса к хранилищу sorl на каждую карточку.
+    """
+    wanted = {}
+    for post in posts:
+        post.ready_thumbnails = {}
+        if not post.image:
+            continue
+        for variant in settings.POST_THUMBNAILS:
+            key = add_prefix(_thumbnail_file(post.image, variant).key)
+            wanted[post, variant] = key
+    if not wanted:
+        return posts
+    kvstore = default.kvstore
+    if isinstance(kvstore, CachedDBKVStore):
+        values = _get_many_raw(kvstore, list(set(wanted.values())))
+        for (post, variant), key in wanted.items():
+            value = values.get(key)
+            post.ready_thumbnails[variant] = (
+                deserialize_image_file(value) if value else None
+            )
+    else:
+        for (post, variant), key in wanted.items():
+            post.ready_thumbnails[variant] = ready_thumbnail(
+                post.image, variant
+            )
+    return posts
+
+
+def family_variants(family):
+    """Варианты семейства ('card') по форматам, в порядке настроек.
+
+    {'WEBP': ['card_480_webp', ...], 'JPEG': [...]}
+    """
+    variants = {
+        image_format: [] for image_format in settings.POST_THUMBNAIL_FORMATS
+    }
+    for name, (geometry, options) in settings.POST_THUMBNAILS.items():
+        if name.startswith(f'{family}_'):
+            variants[options['format']].append(name)
+    return variants
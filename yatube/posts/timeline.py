@@ -0,0 +1,234 @@
+import heapq
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+
+from .models import Follow, Post, PullAuthor, TimelineEntry
+from .utils import NEXT, CursorPaginator, chunks
+
+
+def _bulk_add(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def is_pull_author(author):
+    return PullAuthor.objects.filter(author=author).exists()
+
+
+def refresh_pull_author(author):
+    """Переводит автора в режим pull, если подписчиков стало слишком много.
+
+    Обратно автор не переводится: его старые посты уже не разложены
+    по лентам, и подмешивание при чтении остаётся единственным
+    источником этих постов.
+    """
+    if is_pull_author(author):
+        return True
+    followers = Follow.objects.filter(author=author).count()
+    if followers <= settings.TIMELINE_FANOUT_LIMIT:
+        return False
+    PullAuthor.objects.get_or_create(author=author)
+    return True
+
+
+def fan_out_post(post):
+    if is_pull_author(post.author):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id
+    ).values_list('user', flat=True)
+    _bulk_add(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill_posts(author_id):
+    """(id, pub_date) постов автора, которые подписка кладёт в ленту.
+
+    Только последние TIMELINE_BACKFILL_SIZE: вся история плодовитого
+    автора в ленту не копируется, старые посты остаются в его профиле.
+    Единственное место этого ограничения - им пользуются и add_follow,
+    и rebuild, так что глубина ленты не зависит от способа подписки.
+    """
+    return list(Post.objects.filter(
+        author=author_id
+    ).order_by('-pub_date', '-pk').values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_SIZE])
+
+
+def add_follow(follow):
+    if refresh_pull_author(follow.author):
+        return
+    _bulk_add(
+        TimelineEntry(
+            user_id=follow.user_id, post_id=post_id, pub_date=pub_date
+        )
+        for post_id, pub_date in backfill_posts(follow.author_id)
+    )
+
+
+def remove_follow(follow):
+    TimelineEntry.objects.filter(
+        user=follow.user_id, post__author=follow.author_id
+    ).delete()
+
+
+def rebuild():
+    """Заполняет ленты всех подписок по данным, а не по сигналам.
+
+    Нужна после массовой загрузки через bulk_create: авторы с числом
+    подписчиков больше TIMELINE_FANOUT_LIMIT переводятся в режим pull,
+    остальным подписчикам, как и в add_follow, достаются посты из
+    backfill_posts(). Записи идут потоком порциями, без загрузки
+    подписок в память.
+    """
+    PullAuthor.objects.bulk_create(
+        (
+            PullAuthor(author_id=author_id)
+            for author_id in Follow.objects.values('author').annotate(
+                followers=Count('pk')
+            ).filter(
+                followers__gt=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('author', flat=True).iterator()
+        ),
+        ignore_conflicts=True,
+    )
+    authors = Follow.objects.filter(
+        author__pull_author__isnull=True
+    ).order_by().values_list('author', flat=True).distinct()
+    for author_id in authors.iterator():
+        posts = backfill_posts(author_id)
+        if not posts:
+            continue
+        followers = Follow.objects.filter(
+            author=author_id
+        ).values_list('user', flat=True)
+        entries = (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in followers.iterator()
+            for post_id, pub_date in posts
+        )
+        for chunk in chunks(entries, settings.TIMELINE_BATCH_SIZE):
+            _bulk_add(chunk)
+
+
+def _pull_authors(user):
+    return list(Follow.objects.filter(
+        user=user, author__pull_author__isnull=False
+    ).values_list('author', flat=True))
+
+
+def timeline_posts(user):
+    """Все посты ленты подписок одним запросом, без порядка и страниц.
+
+    Для показа ленты есть TimelinePaginator: он не сортирует всю ленту.
+    """
+    pull_authors = _pull_authors(user)
+    entries = TimelineEntry.objects.filter(user=user).values('post')
+    if not pull_authors:
+        return Post.objects.filter(pk__in=entries)
+    return Post.objects.filter(
+        Q(pk__in=entries) | Q(author__in=pull_authors)
+    )
+
+
+def _after(key_field, pk_field, direction, key, pk):
+    """Условие курсора по (key_field, pk_field), как в CursorPaginator."""
+    if direction == NEXT:
+        return Q(**{f'{key_field}__lte': key}) & (
+            Q(**{f'{key_field}__lt': key}) | Q(**{f'{pk_field}__lt': pk})
+        )
+    return Q(**{f'{key_field}__gte': key}) & (
+        Q(**{f'{key_field}__gt': key}) | Q(**{f'{pk_field}__gt': pk})
+    )
+
+
+class TimelineQuery:
+    """Посты ленты с позиции курсора без сортировки всей ленты.
+
+    Записи ленты читаются по индексу timeline_user_pub_date_idx. Без
+    pull-авторов страница - один запрос постов, соединённых с записями.
+    С ними из записей и из постов pull-авторов (post_author_pub_date_idx)
+    берётся не больше n ключей (pub_date, id), они сливаются, и только
+    посты страницы загружаются целиком.
+    """
+
+    def __init__(self, user, pull_authors, posts, position=None):
+        self.user = user
+        self.pull_authors = pull_authors
+        self.posts = posts
+        self.position = position
+
+    def _ordered(self, queryset, key_field, pk_field, condition):
+        if self.position is not None:
+            condition &= _after(key_field, pk_field, *self.position)
+        sign = '-' if self._descending else ''
+        # Одно filter(): условия на записи ленты должны попасть в одно
+        # соединение, а не в отдельное для каждого вызова.
+        return queryset.filter(condition).order_by(
+            f'{sign}{key_field}', f'{sign}{pk_field}'
+        )
+
+    @property
+    def _descending(self):
+        return self.position is None or self.position[0] == NEXT
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.start or item.step:
+            raise TypeError('TimelineQuery поддерживает только [:n]')
+        if not self.pull_authors:
+            return list(self._ordered(
+                self.posts,
+                'timeline_entries__pub_date',
+                'pk',
+                Q(timeline_entries__user=self.user),
+            )[:item.stop])
+        sources = (
+            (TimelineEntry.objects, 'pub_date', 'post_id',
+             Q(user=self.user)),
+            (Post.objects, 'pub_date', 'pk',
+             Q(author__in=self.pull_authors)),
+        )
+        keys = [
+            list(
+                self._ordered(*source)
+                .values_list(source[1], source[2])[:item.stop]
+            )
+            for source in sources
+        ]
+        ids, seen = [], set()
+        for _, pk in heapq.merge(*keys, reverse=self._descending):
+            # Пост бывшего fan-out автора есть и в записях, и в pull.
+            if pk not in seen and len(ids) < item.stop:
+                seen.add(pk)
+                ids.append(pk)
+        posts = self.posts.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная пагинация ленты подписок по (pub_date, id) поста."""
+
+    def __init__(self, user, per_page, posts=None, prepare=None):
+        self.key_field = 'pub_date'
+        self.prepare = prepare
+        self.user = user
+        self.pull_authors = _pull_authors(user)
+        self.posts = posts if posts is not None else Post.objects.all()
+        Paginator.__init__(
+            self,
+            TimelineQuery(user, self.pull_authors, self.posts),
+            per_page,
+        )
+
+    def keyset(self, direction, key, pk):
+        return TimelineQuery(
+            self.user, self.pull_authors, self.posts, (direction, key, pk)
+        )
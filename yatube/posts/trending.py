@@ -0,0 +1,128 @@
+import datetime
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import TRENDING_VERSION_KEY, bump_version
+from .models import Comment, Follow, Post, TrendingScore
+from .utils import count_subquery
+
+
+def score(recent_comments, followers, pub_date, now):
+    """Рейтинг с затуханием по возрасту поста, как на Hacker News."""
+    age = max((now - pub_date).total_seconds() / 3600, 0)
+    weight = (
+        settings.TRENDING_COMMENT_WEIGHT * recent_comments
+        + math.log2(1 + followers)
+    )
+    return weight / (age + 2) ** settings.TRENDING_GRAVITY
+
+
+def _candidates(now):
+    """Посты, участвующие в рейтинге, с данными для score()."""
+    window = now - datetime.timedelta(
+        hours=settings.TRENDING_COMMENT_WINDOW_HOURS
+    )
+    since = now - datetime.timedelta(days=settings.TRENDING_MAX_AGE_DAYS)
+    return Post.objects.filter(pub_date__gte=since).annotate(
+        recent_comments=count_subquery(
+            Comment.objects.filter(created__gte=window), 'post'
+        ),
+        followers=count_subquery(Follow.objects, 'author', outer='author'),
+    ).values_list('pk', 'recent_comments', 'followers', 'pub_date')
+
+
+def update_post(post_id, now=None):
+    """Пересчитывает рейтинг одного поста, например после комментария."""
+    now = now or timezone.now()
+    row = _candidates(now).filter(pk=post_id).first()
+    if row is None:
+        TrendingScore.objects.filter(post=post_id).delete()
+    else:
+        post_id, recent_comments, followers, pub_date = row
+        TrendingScore.objects.update_or_create(
+            post_id=post_id,
+            defaults={
+                'score': score(recent_comments, followers, pub_date, now),
+                'updated': now,
+            },
+        )
+    bump_version(TRENDING_VERSION_KEY)
+
+
+def update_author(author_id, now=None):
+    """Пересчитывает рейтинги свежих постов автора после (от)подписки."""
+    now = now or timezone.now()
+    total = _rescore(_candidates(now).filter(author=author_id), now)
+    if total:
+        bump_version(TRENDING_VERSION_KEY)
+    return total
+
+
+def _rescore(candidates, now):
+    scores = {
+        post_id: score(recent_comments, followers, pub_date, now)
+        for post_id, recent_comments, followers, pub_date
+        in candidates.iterator()
+    }
+    existing = TrendingScore.objects.in_bulk(
+        list(scores), field_name='post_id'
+    )
+    for post_id, value in scores.items():
+        if post_id in existing:
+            existing[post_id].score = value
+            existing[post_id].updated = now
+    TrendingScore.objects.bulk_update(
+        existing.values(), ('score', 'updated'),
+        batch_size=settings.TRENDING_BATCH_SIZE,
+    )
+    TrendingScore.objects.bulk_create(
+        (
+            TrendingScore(post_id=post_id, score=value, updated=now)
+            for post_id, value in scores.items() if post_id not in existing
+        ),
+        batch_size=settings.TRENDING_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(scores)
+
+
+def update(now=None):
+    """Обновляет рейтинг популярного и убирает устаревшие посты.
+
+    Новые посты, комментарии и подписки пересчитывают рейтинги затронутых
+    постов сразу, в сигналах. Здесь рейтинг получают посты без него
+    (например, после bulk_create), а остальные пересчитываются только
+    если могут попасть в первые TRENDING_SIZE. Без событий вес поста
+    не растёт, а возраст только увеличивается, поэтому сохранённый
+    рейтинг - верхняя граница текущего: пока среди первых по нему есть
+    пересчитанные раньше, они пересчитываются, а посты ниже порога не
+    читаются вовсе.
+    """
+    now = now or timezone.now()
+    since = now - datetime.timedelta(days=settings.TRENDING_MAX_AGE_DAYS)
+    TrendingScore.objects.filter(post__pub_date__lt=since).delete()
+    total = _rescore(_candidates(now).filter(trending__isnull=True), now)
+    while True:
+        stale = [
+            post_id for post_id, updated in TrendingScore.objects.order_by(
+                '-score', '-post_id'
+            ).values_list('post', 'updated')[:settings.TRENDING_SIZE]
+            if updated < now
+        ]
+        rescored = stale and _rescore(
+            _candidates(now).filter(pk__in=stale), now
+        )
+        if not rescored:
+            break
+        total += rescored
+    bump_version(TRENDING_VERSION_KEY)
+    return total
+
+
+def trending_posts():
+    """Самые популярные посты одним запросом по индексу рейтинга."""
+    return Post.objects.filter(trending__isnull=False).select_related(
+        'author', 'group'
+    ).order_by('-trending__score', '-pk')[:settings.TRENDING_SIZE]
@@ -6,11 +6,19 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('group/', views.groups_index, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('search/', views.search, name='search'),
+    path('trending/', views.trending, name='trending'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('create/', views.post_create, name='post_create'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
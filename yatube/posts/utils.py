@@ -1,8 +1,217 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import datetime
+import itertools
+
 from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .thumbnails import prefetch_thumbnails
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, key, pk):
+    if isinstance(key, datetime.datetime):
+        key = key.isoformat()
+    raw = f'{direction}|{key}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse_key=parse_datetime):
+    """Разбирает токен курсора, для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, key, pk = raw.decode().split('|')
+        key = parse_key(key)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or key is None:
+        return None
+    return direction, key, pk
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации.
+
+    Номера страниц неизвестны без COUNT(*), поэтому навигация идёт
+    только через next_cursor/previous_cursor. Запрос выполняется при
+    первом обращении к записям: при попадании в кеш фрагмента шаблона
+    база не трогается вовсе.
+    """
+
+    def __init__(self, queryset, paginator, direction, has_cursor):
+        self.number = None
+        self.paginator = paginator
+        self._queryset = queryset
+        self._direction = direction
+        self._has_cursor = has_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    @cached_property
+    def _fetched(self):
+        per_page = self.paginator.per_page
+        rows = list(self._queryset[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if self._direction != NEXT:
+            rows.reverse()
+        if self.paginator.prepare is not None:
+            self.paginator.prepare(rows)
+        if self._direction == NEXT:
+            return rows, has_more, self._has_cursor
+        return rows, self._has_cursor, has_more
+
+    @property
+    def object_list(self):
+        return self._fetched[0]
+
+    def has_next(self):
+        return self._fetched[1]
+
+    def has_previous(self):
+        return self._fetched[2]
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.cursor_for(PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (key_field, id) без COUNT(*) и OFFSET.
+
+    Каждая страница — один запрос LIMIT per_page + 1 с условием
+    на ключ последней (или первой) записи предыдущей страницы.
+    """
+
+    cursor_based = True
+    parse_key = staticmethod(parse_datetime)
+
+    def __init__(self, object_list, per_page, key_field='pub_date',
+                 prepare=None):
+        self.key_field = key_field
+        self.prepare = prepare
+        super().__init__(
+            object_list.order_by(f'-{key_field}', '-pk'), per_page
+        )
+
+    def cursor_for(self, direction, obj):
+        return encode_cursor(direction, getattr(obj, self.key_field), obj.pk)
+
+    def get_page(self, cursor):
+        position = decode_cursor(cursor, self.parse_key) if cursor else None
+        if position is None:
+            return CursorPage(self.object_list, self, NEXT, has_cursor=False)
+        return CursorPage(
+            self.keyset(*position), self, position[0], has_cursor=True
+        )
+
+    def keyset(self, direction, key, pk):
+        """Записи после (NEXT) или до (PREVIOUS) позиции курсора."""
+        # Отдельное условие key <= курсор даёт базе диапазон для поиска
+        # по индексу, одно OR-условие превращается в полный скан.
+        if direction == NEXT:
+            return self.object_list.filter(
+                Q(**{f'{self.key_field}__lte': key}),
+                Q(**{f'{self.key_field}__lt': key}) | Q(pk__lt=pk),
+            )
+        return self.object_list.filter(
+            Q(**{f'{self.key_field}__gte': key}),
+            Q(**{f'{self.key_field}__gt': key}) | Q(pk__gt=pk),
+        ).reverse()
+
+
+class PreparedPage(Page):
+    """Страница, записи которой обрабатываются prepare при загрузке."""
+
+    def __init__(self, object_list, number, paginator):
+        self._object_list = object_list
+        self.number = number
+        self.paginator = paginator
+
+    @cached_property
+    def object_list(self):
+        rows = list(self._object_list)
+        self.paginator.prepare(rows)
+        return rows
+
+
+class PreparedPaginator(Paginator):
+    """Paginator, вызывающий prepare(rows) для записей страницы."""
+
+    def __init__(self, object_list, per_page, prepare):
+        self.prepare = prepare
+        super().__init__(object_list, per_page)
+
+    def _get_page(self, *args, **kwargs):
+        return PreparedPage(*args, **kwargs)
 
 
 def paginate_page(request, post_list):
-    paginator = Paginator(post_list, settings.SORT_PAGES)
+    # Миниатюры всей страницы достаются одним запросом при загрузке
+    # записей, а не тегом шаблона на каждую карточку.
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = PreparedPaginator(
+            post_list, settings.SORT_PAGES, prefetch_thumbnails
+        )
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        post_list, settings.SORT_PAGES, prepare=prefetch_thumbnails
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def paginate_comments(request, comment_list):
+    paginator = CursorPaginator(
+        comment_list, settings.COMMENTS_PER_PAGE, key_field='created'
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def chunks(iterable, size):
+    """Списки по size элементов из iterable, без чтения его целиком.
+
+    bulk_create превращает аргумент в список, поэтому большие потоки
+    объектов передаются ему такими порциями.
+    """
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def count_subquery(queryset, field, outer='pk'):
+    """Число строк queryset, у которых field равно outer внешнего запроса.
+
+    Годится для annotate() и update(): счётчик считается в том же
+    запросе, для строк без совпадений - 0, а не NULL.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
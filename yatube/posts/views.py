@@ -1,23 +1,49 @@
 from webbrowser import get
 from django.shortcuts import get_object_or_404, redirect, render
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.utils.http import urlencode
 
+from .caching import (
+    CONTENT_VERSION_KEY, FEED_VERSION_KEY, FOLLOW_VERSION_KEY,
+    TRENDING_VERSION_KEY, conditional_page, feed_page_key, feed_version
+)
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-from .utils import paginate_page
+from .groups import attach_latest_posts, get_group_or_404
+from .models import Follow, Group, Post, User
+from .search import SearchPaginator, match_expression, search_posts
+from .thumbnails import prefetch_thumbnails
+from .timeline import TimelinePaginator
+from .trending import trending_posts
+from .utils import PreparedPaginator, paginate_comments, paginate_page
 
 
+@conditional_page(FEED_VERSION_KEY)
 def index(request):
     post_list = Post.objects.select_related('author', 'group').all()
     page_obj = paginate_page(request, post_list)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
+        'page_key': feed_page_key(request),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(FEED_VERSION_KEY)
+def groups_index(request):
+    paginator = PreparedPaginator(
+        Group.objects.order_by('-last_post_at', 'pk'),
+        settings.SORT_PAGES,
+        attach_latest_posts,
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'posts/groups.html', {'page_obj': page_obj})
+
+
+@conditional_page(FEED_VERSION_KEY)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_group_or_404(slug)
     post_list = group.posts.select_related('author')
     page_obj = paginate_page(request, post_list)
     context = {
@@ -27,11 +53,39 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(CONTENT_VERSION_KEY, TRENDING_VERSION_KEY)
+def trending(request):
+    post_list = prefetch_thumbnails(list(trending_posts()))
+    return render(request, 'posts/trending.html', {'post_list': post_list})
+
+
+@conditional_page(FEED_VERSION_KEY)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if match_expression(query):
+        post_list = search_posts(
+            Post.objects.select_related('author', 'group'), query
+        )
+        paginator = SearchPaginator(post_list, settings.SORT_PAGES)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'query_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(FEED_VERSION_KEY, FOLLOW_VERSION_KEY)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     post_list = author.posts.select_related('group')
     page_obj = paginate_page(request, post_list)
-    posts_count = post_list.count()
+    stats = getattr(author, 'stats', None)
+    posts_count = stats.posts_count if stats else 0
     following = Follow.objects.filter(
         author=author.id, user=request.user.id
     ).exists()
@@ -44,10 +98,15 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page(CONTENT_VERSION_KEY)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.select_related('author')
+    comments = paginate_comments(
+        request, post.comments.select_related('author')
+    )
     context = {
         'post': post,
         'form': form,
@@ -56,9 +115,24 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    comments = paginate_comments(
+        request, post.comments.select_related('author')
+    )
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+    )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -75,7 +149,7 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
     )
     if form.is_valid():
         form.save()
@@ -96,10 +170,18 @@ def add_comment(request, post_id):
     return render(request, 'posts/includes/add_comment.html', {'form': form})
 
 
+# Проверка ETag идёт до login_required: 304 не раскрывает содержимого,
+# а пользователя из базы для него загружать не нужно.
+@conditional_page(FEED_VERSION_KEY, FOLLOW_VERSION_KEY)
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate_page(request, post_list)
+    paginator = TimelinePaginator(
+        request.user,
+        settings.SORT_PAGES,
+        posts=Post.objects.select_related('author', 'group'),
+        prepare=prefetch_thumbnails,
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'page_obj': page_obj,
     }
@@ -109,13 +191,13 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    following = request.user.follower.filter(author=author).exists()
-    if request.user != author and not following:
-        follow = Follow(user=request.user, author=author)
-        follow.save
+    if request.user != author:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    # Дизлайк, отписка
-    ...
+    author = get_object_or_404(User, username=username)
+    request.user.follower.filter(author=author).delete()
+    return redirect('posts:profile', username)
@@ -31,7 +31,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -45,7 +48,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -118,14 +121,129 @@ SORT_PAGES = 10
 
 TEST_SORT_PAGES = 13
 
+COMMENTS_PER_PAGE = 20
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_BATCH_SIZE = 500
+
+# Сколько последних постов автора попадает в ленту подписчика при
+# подписке, в build_timelines и в timeline.rebuild() после seed. Более
+# старые посты в ленте не появляются, читатель найдёт их в профиле автора.
+TIMELINE_BACKFILL_SIZE = 200
+
+# Популярное: посты моложе TRENDING_MAX_AGE_DAYS с рейтингом
+# (вес комментариев за окно + log2(1 + подписчики автора))
+# / (возраст в часах + 2) ** TRENDING_GRAVITY.
+TRENDING_MAX_AGE_DAYS = 7
+
+TRENDING_COMMENT_WINDOW_HOURS = 24
+
+TRENDING_COMMENT_WEIGHT = 1.0
+
+TRENDING_GRAVITY = 1.5
+
+TRENDING_SIZE = 30
+
+TRENDING_BATCH_SIZE = 500
+
+GROUP_LATEST_POSTS = 3
+
+GROUP_CACHE_TIMEOUT = 60 * 60
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Как отдавать медиафайлы: None - сам Django (FileResponse),
+# 'x-accel-redirect' - nginx, 'x-sendfile' - Apache/lighttpd.
+# Для nginx нужен internal location с префиксом ниже, смотрящий в
+# MEDIA_ROOT: location /protected-media/ { internal; alias ...; }
+MEDIA_SENDFILE = None
+
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Загрузки всегда пишутся во временный файл с подсчётом SHA-256.
+FILE_UPLOAD_HANDLERS = ['core.uploads.HashingUploadHandler']
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+MAX_IMAGE_PIXELS = 40_000_000
+
+THUMBNAIL_WORKERS = 2
+
+# Ширины и форматы миниатюр для srcset. Последний формат - запасной
+# для <img>, остальные отдаются через <source type=...>.
+POST_THUMBNAIL_WIDTHS = (480, 960, 1440)
+POST_THUMBNAIL_FORMATS = ('WEBP', 'JPEG')
+
+POST_THUMBNAILS = {
+    f'card_{width}_{image_format.lower()}': (
+        f'{width}x{width * 339 // 960}',
+        {'crop': 'center', 'upscale': True, 'format': image_format},
+    )
+    for width in POST_THUMBNAIL_WIDTHS
+    for image_format in POST_THUMBNAIL_FORMATS
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
 
+# Тесты работают с копией кешей во временном каталоге.
+TEST_RUNNER = 'core.testing.TestRunner'
+
+ANON_PAGE_CACHE_TIMEOUT = 600
+
+ANON_PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:groups',
+)
+
+SERVER_TIMING = True
+
+REQUEST_METRICS_WINDOW = 500
+
+# Сколько SQL-запросов может сделать view авторизованному пользователю
+# (сессия и пользователь - два из них); превышение пишется в лог
+# core.middleware.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:groups': 6,
+    'posts:profile': 6,
+    'posts:post_detail': 6,
+    'posts:follow_index': 5,
+    'posts:search': 4,
+    'posts:trending': 4,
+}
+
+PROFILING_ENABLED = False
+
+# Профилируется один запрос из PROFILING_SAMPLE_RATE; 0 - только запросы
+# с заголовком X-Profile.
+PROFILING_SAMPLE_RATE = 1000
+
+# 'collapsed' - сэмплирующий профилировщик, 'pstats' - cProfile.
+PROFILING_FORMAT = 'collapsed'
+
+PROFILING_INTERVAL = 0.005
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+PROFILING_MAX_FILES = 200
+
+PROFILING_TOKEN_MAX_AGE = 24 * 60 * 60
+
 CSRF_FAILURE_VIEW = 'core.views.permission_denied'
@@ -1,18 +1,21 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import request_metrics, serve_media
+
 urlpatterns = [
+    path('admin/metrics/', request_metrics, name='request_metrics'),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts')),
+    path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>',
+        serve_media,
+        name='media',
+    ),
 ]
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
 
 handler404 = 'core.views.page_not_found'